@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the Cardiology Knowledge Graph web application.
+
+Run with: gunicorn -c gunicorn.conf.py src.visualization.app:app
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Requests mostly wait on Neo4j, so each worker process serves several of
+# them on threads. Threaded workers rather than gevent, since the Neo4j
+# driver and the single-flight view cache rely on real threads.
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# The app is imported in each worker after the fork rather than preloaded.
+# Either way the Neo4j driver is only created inside a worker, so every
+# worker has its own connection pool.
+preload_app = False
+
+# Longer than nginx's upstream keepalive_timeout, so its pooled connections
+# are never closed by gunicorn while nginx is about to reuse them
+keepalive = 75
+timeout = 60
+accesslog = "-"
+
+
+def post_worker_init(worker):
+    """Connect each worker to Neo4j and warm its view caches before it accepts its first request."""
+    from src.visualization.app import warm_up
+    warm_up()
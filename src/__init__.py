@@ -0,0 +1,23 @@
+"""
+Cardiology Knowledge Graph package.
+"""
+import logging
+from pathlib import Path
+
+# Repository root; data, cache and .env paths are resolved against it
+project_root = Path(__file__).resolve().parent.parent
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(level=logging.INFO):
+    """
+    Configure root logging for command-line and application entry points.
+
+    Library modules only create their own loggers; this is called once from
+    the entry point so handlers and formats are set up a single time.
+
+    Args:
+        level (int): Logging level for the root logger
+    """
+    logging.basicConfig(level=level, format=LOG_FORMAT)
@@ -6,30 +6,173 @@ import time
 import os
 import json
 import logging
-from urllib.parse import quote_plus
-from Bio import Entrez, Medline
-from pathlib import Path
-import sys
+import hashlib
+import io
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.client import HTTPException
+from urllib.error import HTTPError, URLError
+from Bio import Entrez
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from lxml import etree
 from dotenv import load_dotenv
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+from src import configure_logging, project_root
+from src.json_utils import loads, write_json, write_jsonl
 
 # Load environment variables from .env file
 load_dotenv(os.path.join(project_root, '.env'))
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+def _element_text(element):
+    """
+    Get the full text of an XML element, including any inline markup.
+    
+    Args:
+        element: lxml element, or None
+        
+    Returns:
+        str: Text content of the element ('' if missing)
+    """
+    if element is None:
+        return ''
+    return ''.join(element.itertext()).strip()
+
+def _xml_to_dict(article):
+    """
+    Convert a PubmedArticle XML element into an article metadata dictionary.
+    
+    Args:
+        article: lxml element for a single PubmedArticle
+        
+    Returns:
+        dict: Article metadata
+    """
+    citation = article.find('MedlineCitation')
+    details = citation.find('Article')
+    
+    # Collect authors as "LastName Initials", matching the MEDLINE format
+    authors = []
+    for author in details.iterfind('AuthorList/Author'):
+        if author.find('LastName') is not None:
+            name = ' '.join(filter(None, [_element_text(author.find('LastName')),
+                                          _element_text(author.find('Initials'))]))
+        else:
+            name = _element_text(author.find('CollectiveName'))
+        if name:
+            authors.append(name)
+    
+    # Publication date is either structured or a free-text MedlineDate
+    pub_date = details.find('Journal/JournalIssue/PubDate')
+    if pub_date is not None and pub_date.find('MedlineDate') is not None:
+        publication_date = _element_text(pub_date.find('MedlineDate'))
+    elif pub_date is not None:
+        publication_date = ' '.join(filter(None, [_element_text(pub_date.find(part))
+                                                  for part in ('Year', 'Month', 'Day')]))
+    else:
+        publication_date = ''
+    
+    return {
+        'PMID': _element_text(citation.find('PMID')),
+        'ArticleTitle': _element_text(details.find('ArticleTitle')),
+        'AbstractText': ' '.join(_element_text(part) for part in details.iterfind('Abstract/AbstractText')),
+        'Authors': authors,
+        'Journal': _element_text(details.find('Journal/Title')),
+        'PubDate': publication_date,
+        'MeshHeading': [_element_text(heading) for heading in citation.iterfind('MeshHeadingList/MeshHeading/DescriptorName')],
+        'Keyword': [_element_text(keyword) for keyword in citation.iterfind('KeywordList/Keyword')]
+    }
+
+def _parse_pubmed_xml(data):
+    """
+    Stream-parse a PubmedArticleSet document one article at a time.
+    
+    Args:
+        data (bytes): Raw EFetch XML response
+        
+    Yields:
+        dict: Article metadata for each PubmedArticle
+    """
+    for _, elem in etree.iterparse(io.BytesIO(data), tag='PubmedArticle'):
+        yield _xml_to_dict(elem)
+        
+        # Free the parsed element and its already-processed siblings
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+def _is_transient_error(exc):
+    """
+    Check whether a failed Entrez call is worth retrying.
+    
+    Args:
+        exc (Exception): Exception raised by the call
+        
+    Returns:
+        bool: True for throttling, server errors and network failures
+    """
+    if isinstance(exc, HTTPError):
+        return exc.code == 429 or exc.code >= 500
+    return isinstance(exc, (URLError, HTTPException, ConnectionError, TimeoutError))
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+def _retry_wait(retry_state):
+    """
+    Compute the delay before the next retry, honoring Retry-After on HTTP 429.
+    
+    Args:
+        retry_state: tenacity state for the current call
+        
+    Returns:
+        float: Seconds to wait
+    """
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, HTTPError) and exc.code == 429 and exc.headers:
+        retry_after = exc.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return float(retry_after)
+    return _backoff(retry_state)
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls to at most a fixed rate."""
+    
+    def __init__(self, rate_per_sec):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            rate_per_sec (float): Maximum number of calls allowed per second
+        """
+        self.interval = 1.0 / rate_per_sec
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Block until the caller is allowed to make the next call.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        
+        if wait > 0:
+            time.sleep(wait)
+
 class PubMedFetcher:
     """Class to fetch cardiology articles from PubMed."""
     
-    def __init__(self, email=None, api_key=None, save_dir="data/raw"):
+    # Cached Entrez responses are reused for up to a week
+    CACHE_TTL = 7 * 24 * 60 * 60
+    
+    # Search term parts shared by every query
+    _SUFFIX = "[Title/Abstract] AND cardiology[MeSH Terms] AND free full text[filter]"
+    _DATE_TMPL = " AND {f}:{t}[pdat]"
+    
+    def __init__(self, email=None, api_key=None, save_dir="data/raw", max_workers=8, use_cache=True):
         """
         Initialize the PubMed fetcher.
         
@@ -37,6 +180,8 @@ class PubMedFetcher:
             email (str): Your email address (required by NCBI)
             api_key (str, optional): NCBI API key for higher rate limits
             save_dir (str): Directory to save fetched articles
+            max_workers (int): Maximum number of concurrent full-text lookups
+            use_cache (bool): Whether to cache raw Entrez responses on disk
         """
         # Get credentials from environment variables if not provided
         self.email = email or os.environ.get('PUBMED_EMAIL')
@@ -47,17 +192,152 @@ class PubMedFetcher:
         
         # Set up required properties for NCBI's E-utilities
         Entrez.email = self.email
+        Entrez.tool = "cardio-kg"
         if self.api_key:
             Entrez.api_key = self.api_key
         
+        # NCBI allows 10 requests/second with an API key and 3 without
+        self.rate_limiter = RateLimiter(10 if self.api_key else 3)
+        self.max_workers = max_workers
+        
         # Set up the save directory
         self.save_dir = os.path.join(project_root, save_dir)
         os.makedirs(self.save_dir, exist_ok=True)
         
+        # Set up the response cache directory
+        self.use_cache = use_cache
+        self.cache_dir = os.path.join(project_root, ".cache", "pubmed")
+        if self.use_cache:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._evict_expired_responses()
+        
+        # PMIDs known to have no PMC version, with the time they were checked
+        self._pmc_negatives_path = os.path.join(self.cache_dir, "pmc_negatives.json")
+        self._pmc_negatives = self._load_pmc_negatives()
+        self._pmc_lock = threading.Lock()
+    
+    def _load_pmc_negatives(self):
+        """
+        Load the on-disk cache of PMIDs without a PMC link.
+        
+        Returns:
+            dict: Mapping of PMID to the time it was last checked
+        """
+        if not self.use_cache or not os.path.exists(self._pmc_negatives_path):
+            return {}
+        
+        try:
+            with open(self._pmc_negatives_path, 'rb') as f:
+                return loads(f.read())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable PMC link cache: {str(e)}")
+            return {}
+    
+    def _evict_expired_responses(self):
+        """
+        Delete cached Entrez responses older than CACHE_TTL.
+        
+        The PMC negatives file is kept; its entries expire individually.
+        """
+        cutoff = time.time() - self.CACHE_TTL
+        evicted = 0
+        
+        for entry in os.scandir(self.cache_dir):
+            if entry.name == "pmc_negatives.json" or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    evicted += 1
+            except OSError:
+                # Already removed by a concurrent fetcher
+                pass
+        
+        if evicted:
+            logger.info(f"Evicted {evicted} expired responses from the PubMed cache")
+    
+    def _entrez_request(self, func, cache_params=None, **params):
+        """
+        Run an Entrez request, serving it from the on-disk cache when possible.
+        
+        The raw response bytes are cached under a hash of the request
+        parameters, so warm runs only need to re-parse them locally.
+        Requests tied to a history server session (a search storing its
+        results there, or a fetch by WebEnv) are never cached under their
+        own parameters, since NCBI expires the session within hours, and
+        neither are responses reporting an error.
+        
+        Args:
+            func (callable): Entrez function to call (e.g. Entrez.esearch)
+            cache_params (dict, optional): Parameters of an equivalent request
+                                           to cache the response under instead
+            **params: Parameters for the Entrez call
+            
+        Returns:
+            bytes: Raw response body
+        """
+        if cache_params is None:
+            cache_params = params
+        cacheable = (self.use_cache and cache_params.get('usehistory') != 'y'
+                     and 'webenv' not in cache_params)
+        
+        key_data = json.dumps({'function': func.__name__, **cache_params}, sort_keys=True, default=str)
+        cache_path = os.path.join(self.cache_dir, hashlib.sha1(key_data.encode('utf-8')).hexdigest())
+        
+        if cacheable and os.path.exists(cache_path):
+            if time.time() - os.path.getmtime(cache_path) < self.CACHE_TTL:
+                with open(cache_path, 'rb') as f:
+                    return f.read()
+        
+        data = self._call_entrez(func, **params)
+        
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        
+        # NCBI reports some failures in the body of a successful response
+        if cacheable and b'<ERROR>' not in data:
+            # Write to a temporary file first so concurrent readers never see partial data
+            tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+        
+        return data
+        
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=_retry_wait,
+        retry=retry_if_exception(_is_transient_error),
+        reraise=True
+    )
+    def _call_entrez(self, func, **params):
+        """
+        Call Entrez and read the response, retrying transient failures.
+        
+        Each attempt waits for its own rate limiter slot.
+        
+        Args:
+            func (callable): Entrez function to call (e.g. Entrez.esearch)
+            **params: Parameters for the Entrez call
+            
+        Returns:
+            bytes or str: Raw response body
+        """
+        self.rate_limiter.acquire()
+        handle = func(**params)
+        try:
+            return handle.read()
+        finally:
+            handle.close()
+        
     def search_articles(self, query, max_results=50, from_date=None, to_date=None):
         """
         Search for cardiology articles in PubMed.
         
+        The results are stored on the NCBI history server so they can be
+        paged through with fetch_article_details_history without sending
+        the PMIDs back to NCBI.
+        
         Args:
             query (str): Search term
             max_results (int): Maximum number of results to return
@@ -65,35 +345,42 @@ class PubMedFetcher:
             to_date (str, optional): End date in format YYYY/MM/DD
             
         Returns:
-            list: List of PubMed IDs (PMIDs)
+            dict: History server handle with 'webenv', 'query_key' and 'count'
+                  keys, and the matching 'pmids' in order, or None if the
+                  search failed
         """
         logger.info(f"Searching PubMed for: {query}")
         
         # Construct the search term with a cardiology focus
-        search_term = f"{query}[Title/Abstract] AND cardiology[MeSH Terms] AND free full text[filter]"
-        
-        # Add date range if provided
-        if from_date and to_date:
-            search_term += f" AND {from_date}:{to_date}[pdat]"
+        # (with a date range if provided)
+        search_term = query + self._SUFFIX + (
+            self._DATE_TMPL.format(f=from_date, t=to_date) if from_date and to_date else ""
+        )
         
         try:
             # Perform the search using Entrez API
-            handle = Entrez.esearch(
+            data = self._entrez_request(
+                Entrez.esearch,
                 db="pubmed",
                 term=search_term,
                 retmax=max_results,
-                sort="relevance"
+                sort="relevance",
+                usehistory="y"
             )
-            record = Entrez.read(handle)
-            handle.close()
+            record = Entrez.read(io.BytesIO(data))
             
-            pmids = record["IdList"]
-            logger.info(f"Found {len(pmids)} articles for '{query}'")
-            return pmids
+            count = min(int(record["Count"]), max_results)
+            logger.info(f"Found {count} articles for '{query}'")
+            return {
+                "webenv": record["WebEnv"],
+                "query_key": record["QueryKey"],
+                "count": count,
+                "pmids": list(record["IdList"])[:count]
+            }
             
         except Exception as e:
             logger.error(f"Error searching PubMed: {str(e)}")
-            return []
+            return None
     
     def fetch_article_details(self, pmids):
         """
@@ -115,9 +402,8 @@ class PubMedFetcher:
             ids = ','.join(pmids)
             
             # Fetch the articles
-            handle = Entrez.efetch(db="pubmed", id=ids, rettype="medline", retmode="text")
-            records = list(Medline.parse(handle))
-            handle.close()
+            data = self._entrez_request(Entrez.efetch, db="pubmed", id=ids, rettype="xml", retmode="xml")
+            records = list(_parse_pubmed_xml(data))
             
             logger.info(f"Successfully fetched details for {len(records)} articles")
             return records
@@ -126,87 +412,246 @@ class PubMedFetcher:
             logger.error(f"Error fetching article details: {str(e)}")
             return []
     
-    def fetch_full_text(self, pmid):
+    def fetch_article_details_history(self, webenv, query_key, count, batch_size=200, pmids=None):
         """
-        Attempt to fetch the full text of an article from PubMed Central.
+        Fetch details for search results stored on the NCBI history server.
+        
+        The WebEnv is new for every search, so when the results' PMIDs are
+        given, each page is cached under them instead, as if it had been
+        fetched by ID with fetch_article_details.
         
         Args:
-            pmid (str): PubMed ID
+            webenv (str): WebEnv returned by search_articles
+            query_key (str): QueryKey returned by search_articles
+            count (int): Number of results to fetch
+            batch_size (int): Number of records to request per EFetch call
+            pmids (list, optional): PMIDs of the results, in order
             
         Returns:
-            str: Full text content if available, None otherwise
+            list: List of article metadata dictionaries
         """
-        try:
-            # First, try to find a link to PubMed Central
-            handle = Entrez.elink(dbfrom="pubmed", db="pmc", linkname="pubmed_pmc", id=pmid)
-            record = Entrez.read(handle)
-            handle.close()
+        if not count:
+            return []
+        
+        logger.info(f"Fetching details for {count} articles from the history server")
+        
+        # Page cache keys are only right if every result's PMID is known
+        if pmids and len(pmids) < count:
+            pmids = None
+        records = []
+        
+        for start in range(0, count, batch_size):
+            page_pmids = pmids[start:start + batch_size] if pmids else None
+            cache_params = ({'db': "pubmed", 'id': ','.join(page_pmids), 'rettype': "xml", 'retmode': "xml"}
+                            if page_pmids else None)
             
-            # Check if there's a link to PMC
-            if record[0]["LinkSetDb"] and record[0]["LinkSetDb"][0]["Link"]:
-                pmc_id = record[0]["LinkSetDb"][0]["Link"][0]["Id"]
-                logger.info(f"Found PMC ID {pmc_id} for PMID {pmid}")
+            try:
+                data = self._entrez_request(
+                    Entrez.efetch,
+                    cache_params=cache_params,
+                    db="pubmed",
+                    rettype="xml",
+                    retmode="xml",
+                    retstart=start,
+                    retmax=min(batch_size, count - start),
+                    webenv=webenv,
+                    query_key=query_key
+                )
+                records.extend(_parse_pubmed_xml(data))
                 
-                # Fetch the full text from PMC
-                try:
-                    handle = Entrez.efetch(db="pmc", id=pmc_id, rettype="text", retmode="text")
-                    full_text = handle.read()
-                    handle.close()
-                    return full_text
-                except Exception as e:
-                    logger.warning(f"Error fetching full text for PMC ID {pmc_id}: {str(e)}")
-                    return None
+            except Exception as e:
+                logger.error(f"Error fetching article details at offset {start}: {str(e)}")
+        
+        logger.info(f"Successfully fetched details for {len(records)} articles")
+        return records
+    
+    def fetch_pmc_links(self, pmids, batch_size=200):
+        """
+        Look up the PubMed Central IDs for many articles at once.
+        
+        PMIDs are sent to elink in batches (one LinkSet comes back per PMID),
+        and PMIDs without a PMC version are remembered on disk so re-runs
+        skip them.
+        
+        Args:
+            pmids (list): PubMed IDs
+            batch_size (int): Number of PMIDs per elink request
+            
+        Returns:
+            dict: Mapping of PMID to PMC ID, or None if there is no PMC version
+        """
+        links = {}
+        pending = []
+        now = time.time()
+        
+        for pmid in pmids:
+            checked = self._pmc_negatives.get(pmid)
+            if checked and now - checked < self.CACHE_TTL:
+                links[pmid] = None
             else:
-                logger.info(f"No PMC link found for PMID {pmid}")
-                return None
-                
+                pending.append(pmid)
+        
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            try:
+                # A list of IDs (rather than a comma-joined string) gets a LinkSet per PMID
+                data = self._entrez_request(Entrez.elink, dbfrom="pubmed", db="pmc", linkname="pubmed_pmc", id=batch)
+                record = Entrez.read(io.BytesIO(data))
+            except Exception as e:
+                logger.warning(f"Error finding PMC links for {len(batch)} PMIDs: {str(e)}")
+                continue
+            
+            for link_set in record:
+                pmc_id = None
+                for link_set_db in link_set.get("LinkSetDb", []):
+                    if link_set_db.get("LinkName") == "pubmed_pmc" and link_set_db["Link"]:
+                        pmc_id = link_set_db["Link"][0]["Id"]
+                        break
+                for pmid in link_set["IdList"]:
+                    links[str(pmid)] = pmc_id
+            
+            for pmid in batch:
+                links.setdefault(pmid, None)
+        
+        # Remember the negatives for the next run
+        negatives = [pmid for pmid in pending if pmid in links and links[pmid] is None]
+        if negatives and self.use_cache:
+            with self._pmc_lock:
+                self._pmc_negatives.update((pmid, now) for pmid in negatives)
+                write_json(self._pmc_negatives_path, self._pmc_negatives, indent=False)
+        
+        logger.info(f"Found PMC versions for {sum(1 for pmc_id in links.values() if pmc_id)} of {len(pmids)} articles")
+        return links
+    
+    def fetch_pmc_text(self, pmc_id):
+        """
+        Fetch the full text of an article from PubMed Central.
+        
+        Args:
+            pmc_id (str): PubMed Central ID
+            
+        Returns:
+            str: Full text content if available, None otherwise
+        """
+        try:
+            data = self._entrez_request(Entrez.efetch, db="pmc", id=pmc_id, rettype="text", retmode="text")
+            return data.decode('utf-8')
         except Exception as e:
-            logger.warning(f"Error finding PMC link for PMID {pmid}: {str(e)}")
+            logger.warning(f"Error fetching full text for PMC ID {pmc_id}: {str(e)}")
             return None
     
-    def save_article(self, article, full_text=None):
+    def fetch_full_text(self, pmid):
         """
-        Save an article's metadata and full text to a JSON file.
+        Attempt to fetch the full text of an article from PubMed Central.
+        
+        Args:
+            pmid (str): PubMed ID
+            
+        Returns:
+            str: Full text content if available, None otherwise
+        """
+        pmc_id = self.fetch_pmc_links([pmid]).get(pmid)
+        if not pmc_id:
+            logger.info(f"No PMC link found for PMID {pmid}")
+            return None
+        
+        logger.info(f"Found PMC ID {pmc_id} for PMID {pmid}")
+        return self.fetch_pmc_text(pmc_id)
+    
+    def _article_record(self, article, full_text=None):
+        """
+        Convert fetched article metadata into the saved record format.
         
         Args:
             article (dict): Article metadata
             full_text (str, optional): Article full text
             
         Returns:
-            str: Path to the saved file
+            dict: Serializable article record, or None if the article is invalid
         """
-        if not article or 'PMID' not in article:
+        if not article or not article.get('PMID'):
             logger.warning("Cannot save article: Invalid article data or missing PMID")
             return None
         
-        pmid = article['PMID']
-        
-        # Convert the article object to a serializable format
-        article_data = {
-            'pmid': pmid,
-            'title': article.get('TI', ''),
-            'abstract': article.get('AB', ''),
-            'authors': article.get('AU', []),
-            'journal': article.get('JT', ''),
-            'publication_date': article.get('DP', ''),
-            'mesh_terms': article.get('MH', []),
-            'keywords': article.get('OT', []),
+        return {
+            'pmid': article['PMID'],
+            'title': article.get('ArticleTitle', ''),
+            'abstract': article.get('AbstractText', ''),
+            'authors': article.get('Authors', []),
+            'journal': article.get('Journal', ''),
+            'publication_date': article.get('PubDate', ''),
+            'mesh_terms': article.get('MeshHeading', []),
+            'keywords': article.get('Keyword', []),
             'full_text': full_text if full_text else None,
             'source_type': 'pubmed'
         }
+    
+    def save_article(self, article, full_text=None):
+        """
+        Save an article's metadata and full text to a JSON file.
+        
+        Args:
+            article (dict): Article metadata
+            full_text (str, optional): Article full text
+            
+        Returns:
+            str: Path to the saved file
+        """
+        article_data = self._article_record(article, full_text)
+        if article_data is None:
+            return None
+        
+        pmid = article_data['pmid']
         
         # Save to file
         file_path = os.path.join(self.save_dir, f"pubmed_{pmid}.json")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(article_data, f, ensure_ascii=False, indent=2)
+        write_json(file_path, article_data)
             
         logger.info(f"Saved article {pmid} to {file_path}")
         return file_path
+    
+    def save_articles(self, records):
+        """
+        Save many article records to a single JSONL file, one article per line.
+        
+        Args:
+            records (list): Article records as returned by _article_record
+            
+        Returns:
+            str: Path to the saved file
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_path = os.path.join(self.save_dir, f"pubmed_{timestamp}.jsonl")
+        write_jsonl(file_path, records)
+        
+        logger.info(f"Saved {len(records)} articles to {file_path}")
+        return file_path
+        
+    def _fetch_article_record(self, article, pmc_id):
+        """
+        Fetch the full text for an article and build its saved record.
+        
+        Args:
+            article (dict): Article metadata
+            pmc_id (str): PubMed Central ID of the article
+            
+        Returns:
+            dict: Article record, or None if the article could not be processed
+        """
+        try:
+            full_text = self.fetch_pmc_text(pmc_id)
+            return self._article_record(article, full_text)
+        except Exception as e:
+            logger.error(f"Error processing article {article.get('PMID')}: {str(e)}")
+            return None
         
     def get_cardiology_articles(self, search_terms, max_per_term=10, from_date=None, to_date=None):
         """
         Fetch cardiology articles for multiple search terms.
         
+        All fetched articles are written together to one JSONL file. An
+        article returned by several search terms is fetched and saved once.
+        
         Args:
             search_terms (list): List of search terms
             max_per_term (int): Maximum articles to fetch per term
@@ -216,48 +661,67 @@ class PubMedFetcher:
         Returns:
             list: List of paths to saved article files
         """
-        saved_files = []
+        records = []
+        seen_pmids = set()
         
         for term in search_terms:
             logger.info(f"Processing search term: {term}")
             
             # Search for articles
-            pmids = self.search_articles(term, max_results=max_per_term, 
-                                       from_date=from_date, to_date=to_date)
+            search = self.search_articles(term, max_results=max_per_term, 
+                                          from_date=from_date, to_date=to_date)
             
-            if not pmids:
+            if not search or not search['count']:
                 logger.warning(f"No articles found for '{term}'")
                 continue
-                
-            # Process articles in batches to avoid timeouts
-            batch_size = 10
-            for i in range(0, len(pmids), batch_size):
-                batch_pmids = pmids[i:i+batch_size]
-                
-                # Fetch article details
-                articles = self.fetch_article_details(batch_pmids)
-                
-                # Process each article
-                for article in articles:
-                    # Try to fetch full text
-                    full_text = self.fetch_full_text(article['PMID'])
-                    
-                    # Save the article
-                    file_path = self.save_article(article, full_text)
-                    if file_path:
-                        saved_files.append(file_path)
-                
-                # Be nice to NCBI servers
-                time.sleep(0.5)
             
-            # Pause between search terms
-            time.sleep(2)
+            # Page through the results on the history server
+            articles = self.fetch_article_details_history(
+                search['webenv'], search['query_key'], search['count'], pmids=search['pmids']
+            )
+            
+            # Skip articles already found by an earlier term
+            new_articles = []
+            for article in articles:
+                pmid = article.get('PMID')
+                if pmid not in seen_pmids:
+                    seen_pmids.add(pmid)
+                    new_articles.append(article)
+            articles = new_articles
             
-        logger.info(f"Fetched and saved {len(saved_files)} articles in total")
-        return saved_files
+            # Resolve PMC links for the whole batch, then only fetch full texts that exist
+            pmc_links = self.fetch_pmc_links([article['PMID'] for article in articles if article.get('PMID')])
+            
+            with_full_text = []
+            for article in articles:
+                pmc_id = pmc_links.get(article.get('PMID'))
+                if pmc_id:
+                    with_full_text.append((article, pmc_id))
+                else:
+                    record = self._article_record(article)
+                    if record:
+                        records.append(record)
+            
+            # Fetch full texts concurrently; the rate limiter paces the Entrez calls
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self._fetch_article_record, article, pmc_id)
+                           for article, pmc_id in with_full_text]
+                for future in as_completed(futures):
+                    record = future.result()
+                    if record:
+                        records.append(record)
+        
+        if not records:
+            logger.warning("No articles were fetched")
+            return []
+        
+        file_path = self.save_articles(records)
+        logger.info(f"Fetched and saved {len(records)} articles in total")
+        return [file_path]
 
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
     # Set up the fetcher using environment variables
     fetcher = PubMedFetcher()
     
@@ -2,48 +2,88 @@
 Module for fetching cardiology content from free medical textbooks.
 """
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
-import json
 import logging
-import sys
-from pathlib import Path
 from bs4 import BeautifulSoup
 import uuid
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+from src import configure_logging, project_root
+from src.json_utils import write_json, write_jsonl
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Links on the FreeBooks4Doctors index that may point to books
+BOOK_LINK_SELECTOR = 'a[href]:not([href^="#"])'
+SKIPPED_HREFS = frozenset({'', 'index.htm'})
+
 class MedicalTextbookFetcher:
     """Class to fetch cardiology content from free medical textbooks."""
     
-    def __init__(self, save_dir="data/raw"):
+    def __init__(self, save_dir="data/raw", max_workers=4):
         """
         Initialize the medical textbook fetcher.
         
         Args:
             save_dir (str): Directory to save fetched content
+            max_workers (int): Maximum number of concurrent page downloads
         """
         self.save_dir = os.path.join(project_root, save_dir)
         os.makedirs(self.save_dir, exist_ok=True)
+        self.max_workers = max_workers
         
         # Set a user agent to behave like a browser
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Cache-Control': 'max-age=0',
         }
+        
+        # Reuse one session so repeated requests to the same host share
+        # pooled keep-alive connections instead of reconnecting each time
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def close(self):
+        """
+        Close the HTTP session and release pooled connections.
+        """
+        self.session.close()
+    
+    def _fetch_page(self, url):
+        """
+        Fetch a single page using the shared session.
+        
+        Args:
+            url (str): URL of the page to fetch
+            
+        Returns:
+            tuple: (url, response), with response set to None if the request failed
+        """
+        try:
+            logger.info(f"Fetching content from: {url}")
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            return url, response
+        except Exception as e:
+            logger.error(f"Error fetching content from {url}: {str(e)}")
+            return url, None
     
     def fetch_openstax_anatomy(self):
         """
@@ -66,16 +106,18 @@ class MedicalTextbookFetcher:
             "https://openstax.org/books/anatomy-and-physiology/pages/20-2-blood-flow-blood-pressure-and-resistance"
         ]
         
-        for url in cardio_chapter_urls:
+        # Download the chapters concurrently; the bounded pool keeps us polite to the host
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._fetch_page, url) for url in cardio_chapter_urls]
+            pages = [future.result() for future in futures]
+        
+        for url, response in pages:
+            if response is None:
+                continue
+            
             try:
-                logger.info(f"Fetching content from: {url}")
-                
-                # Make a request to get the chapter content
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status()
-                
                 # Parse the HTML content
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = BeautifulSoup(response.content, 'lxml')
                 
                 # Extract the chapter title
                 title_element = soup.find("h1")
@@ -101,19 +143,15 @@ class MedicalTextbookFetcher:
                     
                     # Save to file
                     file_path = os.path.join(self.save_dir, f"openstax_{content_id}.json")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
+                    write_json(file_path, data)
                     
                     saved_files.append(file_path)
                     logger.info(f"Saved OpenStax chapter: {title}")
                 else:
                     logger.warning(f"Could not find content div for: {url}")
-                    
-                # Be polite to the server
-                time.sleep(2)
                 
             except Exception as e:
-                logger.error(f"Error fetching content from {url}: {str(e)}")
+                logger.error(f"Error parsing content from {url}: {str(e)}")
         
         logger.info(f"Fetched {len(saved_files)} OpenStax chapters")
         return saved_files
@@ -122,37 +160,43 @@ class MedicalTextbookFetcher:
         """
         Fetch cardiology books from FreeBooks4Doctors.
         
+        All book references are written together to one JSONL file.
+        
         Returns:
             list: List of paths to saved book reference files
         """
         logger.info("Fetching cardiology books from FreeBooks4Doctors")
         saved_files = []
+        records = []
         
         # URL for cardiology section on FreeBooks4Doctors
         url = "http://www.freebooks4doctors.com/fb/CARD.htm"
         
         try:
             # Make a request to get the list of books
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
             # Parse the HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.content, 'lxml')
             
-            # Find all links that might point to books
-            links = soup.find_all('a')
+            # Select only links that might point to books; in-page anchors are filtered by the selector
+            links = soup.select(BOOK_LINK_SELECTOR)
             
             for link in links:
                 try:
-                    href = link.get('href')
-                    title = link.text.strip()
+                    href = link['href']
                     
                     # Skip empty or navigation links
-                    if not href or not title or href.startswith('#') or href == 'index.htm':
+                    if href in SKIPPED_HREFS:
+                        continue
+                    
+                    title = link.get_text(strip=True)
+                    if not title:
                         continue
                     
                     # Make sure we have a full URL
-                    if not href.startswith('http'):
+                    if not href.startswith(('http://', 'https://')):
                         href = f"http://www.freebooks4doctors.com/fb/{href}"
                     
                     # Create a unique ID for this book reference
@@ -168,24 +212,23 @@ class MedicalTextbookFetcher:
                         'source_type': 'book_reference'
                     }
                     
-                    # Save to file
-                    file_path = os.path.join(self.save_dir, f"freebooks_{book_id}.json")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                    
-                    saved_files.append(file_path)
-                    logger.info(f"Saved book reference: {title}")
-                    
-                    # Be polite to the server
-                    time.sleep(1)
+                    records.append(data)
                     
                 except Exception as e:
                     logger.error(f"Error processing book link: {str(e)}")
             
+            # Save all references in a single file
+            if records:
+                date = datetime.now().strftime("%Y%m%d")
+                file_path = os.path.join(self.save_dir, f"freebooks_{date}.jsonl")
+                write_jsonl(file_path, records)
+                saved_files.append(file_path)
+                logger.info(f"Saved {len(records)} book references to {file_path}")
+            
         except Exception as e:
             logger.error(f"Error fetching book list from {url}: {str(e)}")
         
-        logger.info(f"Fetched {len(saved_files)} book references")
+        logger.info(f"Fetched {len(records)} book references")
         return saved_files
         
     def fetch_all_sources(self):
@@ -210,5 +253,9 @@ class MedicalTextbookFetcher:
 
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
     fetcher = MedicalTextbookFetcher()
-    fetcher.fetch_all_sources() 
\ No newline at end of file
+    try:
+        fetcher.fetch_all_sources()
+    finally:
+        fetcher.close() 
\ No newline at end of file
@@ -1,27 +1,27 @@
 """
 Database connector module for Neo4j connection management.
 """
-from py2neo import Graph
+from neo4j import GraphDatabase
+import functools
 import logging
 import os
-from pathlib import Path
-import sys
 from dotenv import load_dotenv
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+from src import project_root
 
-# Load environment variables from .env file
-load_dotenv(os.path.join(project_root, '.env'))
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+_env_loaded = False
+
+def _load_env():
+    """
+    Load environment variables from the project .env file on first use.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv(os.path.join(project_root, '.env'))
+        _env_loaded = True
+
 class Neo4jConnector:
     """
     Manages connections to the Neo4j database for the Cardiology Knowledge Graph.
@@ -36,23 +36,35 @@ class Neo4jConnector:
             user (str): Neo4j username
             password (str): Neo4j password
         """
+        _load_env()
+        
         # Get connection details from environment variables if not provided
         self.uri = uri or os.environ.get("NEO4J_URI", "bolt://localhost:7687")
         self.user = user or os.environ.get("NEO4J_USER", "neo4j")
         self.password = password or os.environ.get("NEO4J_PASSWORD", "password")
-        self.graph = None
+        self.driver = None
         
     def connect(self):
         """
         Establish connection to the Neo4j database.
         
+        The driver keeps an internal pool of Bolt connections, so sessions
+        opened from it reuse sockets instead of reconnecting per query.
+        
         Returns:
-            Graph: A py2neo Graph object representing the connected database
+            Driver: A neo4j Driver connected to the database
         """
         try:
-            self.graph = Graph(self.uri, auth=(self.user, self.password))
+            self.driver = GraphDatabase.driver(
+                self.uri,
+                auth=(self.user, self.password),
+                max_connection_pool_size=int(os.environ.get("NEO4J_MAX_CONNECTION_POOL_SIZE", 100)),
+                max_connection_lifetime=3600,
+                connection_acquisition_timeout=int(os.environ.get("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", 30))
+            )
+            self.driver.verify_connectivity()
             logger.info("Successfully connected to Neo4j database")
-            return self.graph
+            return self.driver
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j database: {str(e)}")
             raise
@@ -62,19 +74,19 @@ class Neo4jConnector:
         Get the current database connection, or create a new one if none exists.
         
         Returns:
-            Graph: A py2neo Graph object representing the connected database
+            Driver: A neo4j Driver connected to the database
         """
-        if self.graph is None:
+        if self.driver is None:
             return self.connect()
-        return self.graph
+        return self.driver
         
     def close(self):
         """
-        Close the database connection.
+        Close the database connection and release pooled sockets.
         """
-        # py2neo doesn't require explicit connection closing,
-        # but we'll keep this method for future extensions or cleanup
-        self.graph = None
+        if self.driver is not None:
+            self.driver.close()
+            self.driver = None
         logger.info("Database connection closed")
         
     def test_connection(self):
@@ -86,14 +98,19 @@ class Neo4jConnector:
         """
         try:
             # Try to execute a simple Cypher query
-            result = self.get_connection().run("RETURN 1 AS test")
-            # Consume the result
-            value = result.evaluate()
-            return value == 1
+            with self.get_connection().session() as session:
+                return session.run("RETURN 1 AS test").single()[0] == 1
         except Exception as e:
             logger.error(f"Connection test failed: {str(e)}")
             return False
 
 
-# Singleton instance for global use
-connector = Neo4jConnector() 
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_connector():
+    """
+    Get the shared connector, creating it on first use.
+    
+    Returns:
+        Neo4jConnector: Connector configured from the environment
+    """
+    return Neo4jConnector() 
\ No newline at end of file
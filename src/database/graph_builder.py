@@ -3,48 +3,447 @@ Module for building the knowledge graph in Neo4j from extracted entities and rel
 """
 import logging
 import os
-import json
-from pathlib import Path
-import sys
+import functools
+import csv
+import hashlib
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+import msgspec
 from tqdm import tqdm
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+from src import configure_logging, project_root
+from src.database.database_connector import get_connector
+from src.json_utils import dumps, iter_json_items
 
-from src.database.database_connector import connector
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Maximum number of UNWIND rows written in one transaction
+BATCH_SIZE = 20000
+
+# Number of CSV lines committed per transaction by LOAD CSV
+CSV_TRANSACTION_SIZE = 50000
+
+# Maximum number of evidence sources and contexts kept on a relationship
+MAX_EVIDENCE = 50
+
+# Separator for list values in CSV cells (ASCII unit separator)
+CSV_LIST_SEPARATOR = '\x1f'
+
+# Entity labels with constraints in the schema
+ENTITY_LABELS = frozenset([
+    'Condition', 'Treatment', 'Mechanism', 'Finding',
+    'Diagnostic', 'Procedure', 'Anatomy'
+])
+
+# Relationship types declared in the schema's RelationshipSchema
+DOMAIN_RELATIONSHIP_TYPES = [
+    'AFFECTS', 'INVOLVES', 'TREATS', 'DIAGNOSES',
+    'INDICATES', 'PERFORMED_ON', 'CONNECTED_TO', 'LEADS_TO'
+]
+
+def _chunks(rows, size=BATCH_SIZE):
+    """
+    Split rows into lists of at most size items.
+    
+    Args:
+        rows (iterable): Rows to split
+        size (int): Maximum chunk size
+        
+    Yields:
+        list: The next chunk of rows
+    """
+    iterator = iter(rows)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+def _run_write(tx, query, rows, params):
+    """
+    Run an UNWIND query inside a managed write transaction.
+    
+    Args:
+        tx: neo4j transaction
+        query (str): Cypher query taking a $rows parameter
+        rows (list): Rows for the query
+        params (dict): Additional query parameters
+        
+    Returns:
+        int: The query's 'written' count, or 0 if it returns nothing
+    """
+    record = tx.run(query, rows=rows, **params).single()
+    return record['written'] if record else 0
+
+# Link entity `e` to the Source named by `row`, counting repeated mentions
+MENTION_CLAUSES = """
+    MATCH (s:Source {id: row.source_id})
+    MERGE (e)-[r:MENTIONED_IN]->(s)
+    ON CREATE SET r.count = row.cnt
+    ON MATCH SET r.count = r.count + row.cnt
+    """
+
+@functools.lru_cache(maxsize=None)
+def _entity_clauses(entity_type, mentions=True):
+    """
+    Build the Cypher clauses that write one entity `row` with the given label.
+    
+    Labels can't be query parameters, so the query text is built per label.
+    It is built once and reused, so each label always sends the same
+    string and Neo4j's plan cache holds one plan per label.
+    
+    Args:
+        entity_type (str): Entity type, used as the node label
+        mentions (bool): Whether to also link the entity to its Source
+        
+    Returns:
+        str: Cypher clauses using `row` and a $category_id parameter
+    """
+    if entity_type not in ENTITY_LABELS:
+        raise ValueError(f"Unknown entity type: {entity_type}")
+    
+    mention_clauses = f"WITH e, row\n{MENTION_CLAUSES}" if mentions else ""
+    
+    # Create the entity nodes if they don't exist; the shared Entity label
+    # lets lookups by name use one index whatever the entity type, and
+    # primary_label saves readers from picking the type out of labels(e)
+    return f"""
+    MERGE (e:{entity_type} {{name: row.name}})
+    ON CREATE SET e:Entity, e.primary_label = '{entity_type}', e.frequency = row.cnt
+    ON MATCH SET e:Entity, e.primary_label = '{entity_type}', e.frequency = e.frequency + row.cnt
+    
+    {mention_clauses}
+    // Connect to appropriate category node
+    WITH e
+    MATCH (c:Category)
+    WHERE id(c) = $category_id
+    MERGE (c)-[:CONTAINS]->(e)
+    """
+
+@functools.lru_cache(maxsize=None)
+def _relationship_clauses(subject_type, object_type, rel_type):
+    """
+    Build the Cypher clauses that write one relationship `row` between two labels.
+    
+    Args:
+        subject_type (str): Label of the subject entities
+        object_type (str): Label of the object entities
+        rel_type (str): Relationship type
+        
+    Returns:
+        str: Cypher clauses using `row`
+    """
+    if subject_type not in ENTITY_LABELS or object_type not in ENTITY_LABELS:
+        raise ValueError(f"Unknown entity type: {subject_type} or {object_type}")
+    if rel_type not in DOMAIN_RELATIONSHIP_TYPES:
+        raise ValueError(f"Unknown relationship type: {rel_type}")
+    
+    return f"""
+    MATCH (subj:{subject_type} {{name: row.subject}})
+    MATCH (obj:{object_type} {{name: row.object}})
+    
+    MERGE (subj)-[r:{rel_type}]->(obj)
+    ON CREATE SET r.count = row.cnt, 
+                  r.confidence = row.avg_conf,
+                  r.evidence_count = row.cnt
+    ON MATCH SET r.count = r.count + row.cnt,
+                 r.confidence = (r.confidence * r.evidence_count + row.avg_conf * row.cnt) / (r.evidence_count + row.cnt),
+                 r.evidence_count = r.evidence_count + row.cnt
+    
+    // Evidence is kept as capped lists on the relationship itself
+    SET r.evidence_sources = (coalesce(r.evidence_sources, []) +
+            [source_id IN row.evidence_sources WHERE NOT source_id IN coalesce(r.evidence_sources, [])])[..{MAX_EVIDENCE}],
+        r.contexts = (coalesce(r.contexts, []) + row.contexts)[..{MAX_EVIDENCE}]
+    
+    // Keep the dual process properties current as the counts change
+    SET r.system1_strength = CASE
+            WHEN r.count > 5 AND r.confidence > 0.7 THEN 'high'
+            WHEN r.count > 2 AND r.confidence > 0.5 THEN 'medium'
+            ELSE 'low'
+        END,
+        r.system2_relevance = CASE
+            WHEN r.evidence_count > 3 THEN 'high'
+            WHEN r.evidence_count > 1 THEN 'medium'
+            ELSE 'low'
+        END
+    """
+
+@functools.lru_cache(maxsize=None)
+def _entity_query(entity_type):
+    """
+    Build the UNWIND query that writes entities with one label.
+    
+    The MENTIONED_IN edges are left to _mention_query, so the query only
+    locks nodes with this label and its category node.
+    
+    Args:
+        entity_type (str): Entity type, used as the node label
+        
+    Returns:
+        str: Cypher query taking $rows and $category_id parameters
+    """
+    return f"""
+    UNWIND $rows AS row
+    {_entity_clauses(entity_type, mentions=False)}
+    RETURN count(e) AS written
+    """
+
+@functools.lru_cache(maxsize=None)
+def _mention_query(entity_type):
+    """
+    Build the UNWIND query that links entities with one label to their sources.
+    
+    Args:
+        entity_type (str): Entity type, used as the node label
+        
+    Returns:
+        str: Cypher query taking a $rows parameter
+    """
+    if entity_type not in ENTITY_LABELS:
+        raise ValueError(f"Unknown entity type: {entity_type}")
+    
+    return f"""
+    UNWIND $rows AS row
+    MATCH (e:{entity_type} {{name: row.name}})
+    WITH e, row
+    {MENTION_CLAUSES}
+    RETURN count(r) AS written
+    """
+
+@functools.lru_cache(maxsize=None)
+def _relationship_query(subject_type, object_type, rel_type):
+    """
+    Build the UNWIND query that writes one type of relationship between two labels.
+    
+    Args:
+        subject_type (str): Label of the subject entities
+        object_type (str): Label of the object entities
+        rel_type (str): Relationship type
+        
+    Returns:
+        str: Cypher query taking a $rows parameter
+    """
+    return f"""
+    UNWIND $rows AS row
+    {_relationship_clauses(subject_type, object_type, rel_type)}
+    RETURN count(r) AS written
+    """
+
+# Create the source nodes if they don't exist
+SOURCE_CLAUSES = """
+    MERGE (s:Source {id: row.id})
+    ON CREATE SET s += row
+    """
+
+# Conversions from LOAD CSV lines (all strings) to the rows the clauses expect
+SOURCE_CSV_ROW = ("{id: line.id, type: line.type, title: line.title, url: line.url, "
+                  "journal: line.journal, publication_date: line.publication_date, pmid: line.pmid}")
+ENTITY_CSV_ROW = "{name: line.name, source_id: line.source_id, cnt: toInteger(line.cnt)}"
+RELATIONSHIP_CSV_ROW = ("{subject: line.subject, object: line.object, "
+                        "avg_conf: toFloat(line.avg_conf), cnt: toInteger(line.cnt), "
+                        "evidence_sources: coalesce(split(line.evidence_sources, $separator), []), "
+                        "contexts: coalesce(split(line.contexts, $separator), [])}")
+
+SOURCE_CSV_FIELDS = ['id', 'type', 'title', 'url', 'journal', 'publication_date', 'pmid']
+ENTITY_CSV_FIELDS = ['name', 'source_id', 'cnt']
+RELATIONSHIP_CSV_FIELDS = ['subject', 'object', 'avg_conf', 'cnt', 'evidence_sources', 'contexts']
+
+def _relationship_stats():
+    """
+    Create an accumulator for relationship mentions, keyed by edge.
+    
+    Returns:
+        defaultdict: Maps (subject type, object type, relationship type, subject,
+                     object) to [confidence sum, mention count, source IDs, contexts]
+    """
+    return defaultdict(lambda: [0.0, 0, [], []])
+
+def _add_relationship(relationship_stats, relationship, source_id):
+    """
+    Add one relationship mention to an accumulator from _relationship_stats.
+    
+    Evidence sources and contexts are capped at MAX_EVIDENCE per edge.
+    
+    Args:
+        relationship_stats (defaultdict): Accumulator to update
+        relationship (Relationship): The mention
+        source_id (str): ID of the source mentioning it
+    """
+    stats = relationship_stats[(
+        relationship.subject_type, relationship.object_type, relationship.relationship,
+        relationship.subject, relationship.object
+    )]
+    stats[0] += relationship.confidence
+    stats[1] += 1
+    if len(stats[2]) < MAX_EVIDENCE and source_id not in stats[2]:
+        stats[2].append(source_id)
+    if relationship.context and len(stats[3]) < MAX_EVIDENCE:
+        stats[3].append(relationship.context)
+
+def _relationship_row(subject, object_entity, stats):
+    """
+    Build the row written for one edge from its accumulated stats.
+    
+    Args:
+        subject (str): Subject entity name
+        object_entity (str): Object entity name
+        stats (list): [confidence sum, mention count, source IDs, contexts]
+        
+    Returns:
+        dict: Row for the relationship clauses
+    """
+    confidence_sum, count, evidence_sources, contexts = stats
+    return {
+        'subject': subject,
+        'object': object_entity,
+        'avg_conf': confidence_sum / count,
+        'cnt': count,
+        'evidence_sources': evidence_sources,
+        'contexts': contexts
+    }
+
+def _csv_query(row_map, clauses):
+    """
+    Build a LOAD CSV query that writes each CSV line with the given clauses.
+    
+    Args:
+        row_map (str): Cypher map expression converting `line` into `row`
+        clauses (str): Cypher clauses using `row`
+        
+    Returns:
+        str: Cypher query taking a $url parameter
+    """
+    return f"""
+    LOAD CSV WITH HEADERS FROM $url AS line
+    CALL {{
+        WITH line
+        WITH {row_map} AS row
+        {clauses}
+    }} IN TRANSACTIONS OF {CSV_TRANSACTION_SIZE} ROWS
+    """
+
+class Entity(msgspec.Struct):
+    """An extracted entity mention."""
+    text: str
+    type: str
+
+class Relationship(msgspec.Struct):
+    """An extracted relationship between two entities."""
+    subject: str
+    subject_type: str
+    object: str
+    object_type: str
+    relationship: str
+    confidence: float = 0.5
+    context: str = ''
+
+class ArticleResult(msgspec.Struct):
+    """Extraction results for one article."""
+    article_data: Dict[str, Any]
+    entities: List[Entity] = []
+    relationships: List[Relationship] = []
+
+def _iter_results(path):
+    """
+    Iterate over the validated articles in a relationship results file.
+    
+    Each article is checked against ArticleResult once, up front, so a
+    malformed article is skipped on its own instead of failing a whole
+    write batch later.
+    
+    Args:
+        path (str): Path to the relationship extraction results
+        
+    Yields:
+        tuple: (article_id, ArticleResult)
+    """
+    for article_id, data in iter_json_items(path):
+        try:
+            yield article_id, msgspec.convert(data, type=ArticleResult)
+        except msgspec.ValidationError as e:
+            logger.warning(f"Skipping malformed results for article {article_id}: {str(e)}")
+
 class KnowledgeGraphBuilder:
     """Class to build the cardiology knowledge graph in Neo4j."""
     
-    def __init__(self):
+    def __init__(self, max_workers=8):
         """
         Initialize the knowledge graph builder.
+        
+        Args:
+            max_workers (int): Maximum number of entity labels written concurrently
         """
-        self.graph = connector.get_connection()
+        self.driver = get_connector().get_connection()
+        self.max_workers = max_workers
         self.entity_count = 0
         self.relationship_count = 0
         self.source_count = 0
+        self._category_ids = self._load_category_ids()
     
-    def create_source_node(self, article_data):
+    def _load_category_ids(self):
         """
-        Create a source node in the graph for an article.
+        Look up the internal IDs of the Category nodes once.
+        
+        Returns:
+            dict: Mapping of category name to node ID
+        """
+        with self.driver.session() as session:
+            records = session.run("MATCH (c:Category) RETURN c.name AS name, id(c) AS id").data()
+        return {record['name']: record['id'] for record in records}
+    
+    def _write_rows(self, query, rows, **params):
+        """
+        Write rows with an UNWIND query, one managed transaction per BATCH_SIZE rows.
+        
+        Managed transactions are retried by the driver on transient errors
+        such as deadlocks or leader changes.
+        
+        Args:
+            query (str): Cypher query taking a $rows parameter
+            rows (list): Rows to write
+            **params: Additional query parameters
+            
+        Returns:
+            int: Total 'written' count reported by the query
+        """
+        if not rows:
+            return 0
+        
+        written = 0
+        with self.driver.session() as session:
+            for chunk in _chunks(rows):
+                written += session.execute_write(_run_write, query, chunk, params)
+        return written
+    
+    def _mark_graph_updated(self):
+        """
+        Stamp the Root node with the time of the latest write.
+        
+        The web app's DualProcessViews poll this stamp and drop their cached
+        results when it changes.
+        """
+        with self.driver.session() as session:
+            session.run("MATCH (root:Root) SET root.updated_at = timestamp()").consume()
+    
+    def _source_properties(self, article_data):
+        """
+        Build the Source node properties for an article.
         
         Args:
             article_data (dict): Article metadata
             
         Returns:
-            str: Source node ID
+            dict: Source node properties, including its 'id'
         """
-        # Generate a source ID based on the article data
-        source_id = article_data.get('id', article_data.get('pmid', str(hash(json.dumps(article_data)))))
+        # Generate a source ID based on the article data; the digest of the
+        # canonical JSON is stable across runs, unlike the salted hash()
+        source_id = (
+            article_data.get('id')
+            or article_data.get('pmid')
+            or hashlib.blake2b(dumps(article_data, sort_keys=True), digest_size=16).hexdigest()
+        )
         
         # Prepare source properties
         source_type = article_data.get('source_type', 'unknown')
@@ -64,123 +463,165 @@ class KnowledgeGraphBuilder:
                 'pmid': article_data.get('pmid', '')
             })
         
-        # Create the source node if it doesn't exist
-        query = """
-        MERGE (s:Source {id: $id})
-        ON CREATE SET s.type = $type, 
-                      s.title = $title, 
-                      s.url = $url
-        """
-        
-        # Add additional properties for PubMed sources
-        if source_type == 'pubmed':
-            query += ", s.journal = $journal, s.publication_date = $publication_date, s.pmid = $pmid"
-        
-        self.graph.run(query, **properties)
-        
-        return source_id
+        return properties
     
-    def create_entity_node(self, entity, source_id):
+    def create_source_nodes(self, rows):
         """
-        Create an entity node in the graph.
+        Create source nodes in the graph with a single query.
         
         Args:
-            entity (dict): Entity data
-            source_id (str): ID of the source node
+            rows (list): Source node properties, as built by _source_properties
             
         Returns:
-            tuple: (entity_text, entity_type)
+            int: Number of rows written
         """
-        entity_text = entity['text']
-        entity_type = entity['type']
-        
-        # Create the entity node if it doesn't exist
         query = f"""
-        MERGE (e:{entity_type} {{name: $name}})
-        ON CREATE SET e.frequency = 1
-        ON MATCH SET e.frequency = e.frequency + 1
-        
-        WITH e
-        
-        MATCH (s:Source {{id: $source_id}})
-        MERGE (e)-[r:MENTIONED_IN]->(s)
-        ON CREATE SET r.count = 1
-        ON MATCH SET r.count = r.count + 1
-        
-        RETURN e.name, e.frequency
+        UNWIND $rows AS row
+        {SOURCE_CLAUSES}
+        RETURN count(s) AS written
         """
         
-        result = self.graph.run(query, name=entity_text, source_id=source_id).data()
-        
-        # Connect to appropriate category node
-        category_query = f"""
-        MATCH (e:{entity_type} {{name: $name}})
-        MATCH (c:Category {{name: 'Cardiac {entity_type}s'}})
-        MERGE (c)-[:CONTAINS]->(e)
+        return self._write_rows(query, rows)
+    
+    def create_source_node(self, article_data):
         """
+        Create a source node in the graph for an article.
         
-        self.graph.run(category_query, name=entity_text)
-        
-        return (entity_text, entity_type)
+        Args:
+            article_data (dict): Article metadata
+            
+        Returns:
+            str: Source node ID
+        """
+        properties = self._source_properties(article_data)
+        self.create_source_nodes([properties])
+        return properties['id']
     
-    def create_relationship_edge(self, relationship, source_id):
+    def create_entity_nodes(self, entity_type, rows):
         """
-        Create a relationship edge between entities in the graph.
+        Create entity nodes of one type in the graph with a single query.
         
         Args:
-            relationship (dict): Relationship data
-            source_id (str): ID of the source node
+            entity_type (str): Entity type, used as the node label
+            rows (list): Dicts with the entity 'name', the 'source_id' mentioning it
+                         and the number of mentions 'cnt'
             
         Returns:
-            bool: True if successful, False otherwise
+            int: Number of rows written
         """
-        subject = relationship['subject']
-        subject_type = relationship['subject_type']
-        object_entity = relationship['object']
-        object_type = relationship['object_type']
-        rel_type = relationship['relationship']
-        confidence = relationship.get('confidence', 0.5)
-        
-        # Create the relationship with evidence
-        query = f"""
-        MATCH (subj:{subject_type} {{name: $subject}})
-        MATCH (obj:{object_type} {{name: $object}})
-        MATCH (s:Source {{id: $source_id}})
+        try:
+            query = _entity_query(entity_type)
+        except ValueError as e:
+            logger.warning(f"Skipping entities: {str(e)}")
+            return 0
         
-        MERGE (subj)-[r:{rel_type}]->(obj)
-        ON CREATE SET r.count = 1, 
-                      r.confidence = $confidence,
-                      r.evidence_count = 1
-        ON MATCH SET r.count = r.count + 1,
-                     r.confidence = (r.confidence * r.evidence_count + $confidence) / (r.evidence_count + 1),
-                     r.evidence_count = r.evidence_count + 1
+        category_id = self._category_ids.get(f"Cardiac {entity_type}s")
+        return self._write_rows(query, rows, category_id=category_id)
+    
+    def create_mention_edges(self, entity_type, rows):
+        """
+        Link entity nodes of one type to the sources mentioning them with a single query.
         
-        MERGE (r)-[e:EVIDENCE]->(s)
-        ON CREATE SET e.context = $context
+        Args:
+            entity_type (str): Entity type, used as the node label
+            rows (list): Dicts with the entity 'name', the 'source_id' mentioning it
+                         and the number of mentions 'cnt'
+            
+        Returns:
+            int: Number of rows written
+        """
+        try:
+            query = _mention_query(entity_type)
+        except ValueError as e:
+            logger.warning(f"Skipping mentions: {str(e)}")
+            return 0
         
-        RETURN subj.name, type(r), obj.name
+        return self._write_rows(query, rows)
+    
+    def create_relationship_edges(self, subject_type, object_type, rel_type, rows):
         """
+        Create relationship edges of one type between entities with a single query.
         
-        try:
-            result = self.graph.run(
-                query,
-                subject=subject,
-                object=object_entity,
-                source_id=source_id,
-                confidence=confidence,
-                context=relationship.get('context', '')
-            ).data()
+        Args:
+            subject_type (str): Label of the subject entities
+            object_type (str): Label of the object entities
+            rel_type (str): Relationship type
+            rows (list): Rows built by _relationship_row
             
-            return len(result) > 0
+        Returns:
+            int: Number of relationships written
+        """
+        try:
+            query = _relationship_query(subject_type, object_type, rel_type)
+            return self._write_rows(query, rows)
             
         except Exception as e:
-            logger.error(f"Error creating relationship: {str(e)}")
-            return False
+            logger.error(f"Error creating {rel_type} relationships: {str(e)}")
+            return 0
+    
+    def _flush(self, executor, sources, entity_counts, relationship_stats):
+        """
+        Write the accumulated sources, entities and relationships, then clear them.
+        
+        Each kind is written in its own phase: all sources first, then the
+        entity nodes, then the MENTIONED_IN edges linking the two, and
+        relationships last, so no phase waits on rows created by a later one.
+        
+        Args:
+            executor (ThreadPoolExecutor): Pool used to write entity labels concurrently
+            sources (list): Source node properties
+            entity_counts (Counter): Mention counts keyed by (type, name, source_id)
+            relationship_stats (defaultdict): Accumulator from _relationship_stats
+        """
+        if not (sources or entity_counts or relationship_stats):
+            return
+        
+        self.create_source_nodes(sources)
+        
+        # Group entities by label
+        entities_by_type = defaultdict(list)
+        for (entity_type, name, source_id), count in entity_counts.items():
+            entities_by_type[entity_type].append({'name': name, 'source_id': source_id, 'cnt': count})
+        
+        # Create entity nodes, one label per worker. Each label's transactions
+        # lock only its own nodes and category, so the workers don't contend.
+        futures = [
+            executor.submit(self.create_entity_nodes, entity_type, rows)
+            for entity_type, rows in entities_by_type.items()
+        ]
+        for future in futures:
+            future.result()
+        self.entity_count += len(entity_counts)
+        
+        # Entities of every label link to the same Source nodes, so the
+        # MENTIONED_IN edges are written one label at a time
+        for entity_type, rows in entities_by_type.items():
+            self.create_mention_edges(entity_type, rows)
+        
+        # Group relationships by endpoint labels and type, one row per unique edge
+        relationships_by_key = defaultdict(list)
+        for (subject_type, object_type, rel_type, subject, object_entity), stats in relationship_stats.items():
+            relationships_by_key[(subject_type, object_type, rel_type)].append(
+                _relationship_row(subject, object_entity, stats)
+            )
+        
+        # Relationships lock both endpoints, so they are written after all entities
+        for (subject_type, object_type, rel_type), rows in relationships_by_key.items():
+            self.relationship_count += self.create_relationship_edges(subject_type, object_type, rel_type, rows)
+        
+        sources.clear()
+        entity_counts.clear()
+        relationship_stats.clear()
     
     def build_graph_from_results(self, relationship_results_path):
         """
         Build the knowledge graph from relationship extraction results.
         
+        The results file is streamed one article at a time. Entities are
+        grouped by label and relationships by (subject label, object label,
+        type), and each group is written with one UNWIND query whenever
+        BATCH_SIZE rows have accumulated.
+        
         Args:
             relationship_results_path (str): Path to the relationship extraction results
             
@@ -194,38 +635,49 @@ class KnowledgeGraphBuilder:
             return 0, 0, 0
         
         try:
-            # Load relationship extraction results
-            with open(relationship_results_path, 'r', encoding='utf-8') as f:
-                results = json.load(f)
-            
-            if not results:
-                logger.warning("Results file is empty")
-                return 0, 0, 0
-            
             # Track metrics
             self.entity_count = 0
             self.relationship_count = 0
             self.source_count = 0
             
-            # Process each article's data
-            for article_id, data in tqdm(results.items(), desc="Building knowledge graph"):
-                # Create source node
-                source_id = self.create_source_node(data['article_data'])
-                self.source_count += 1
-                
-                # Create entity nodes
-                entities = {}
-                for entity in data['entities']:
-                    entity_key = self.create_entity_node(entity, source_id)
-                    entities[entity_key] = True
-                
-                self.entity_count += len(entities)
+            # Rows waiting to be written
+            sources = []
+            entity_counts = Counter()
+            relationship_stats = _relationship_stats()
+            
+            # Entity labels are written concurrently (see _flush); progress is
+            # reported per flushed batch rather than per article
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                    tqdm(desc="Building knowledge graph", unit=" articles", mininterval=0.5) as progress:
+                # Process each article's data
+                for article_id, data in _iter_results(relationship_results_path):
+                    # Queue the source node
+                    source = self._source_properties(data.article_data)
+                    source_id = source['id']
+                    sources.append(source)
+                    self.source_count += 1
+                    
+                    # Count repeated mentions so each entity is sent once per source
+                    entity_counts.update(
+                        (entity.type, entity.text, source_id) for entity in data.entities
+                    )
+                    
+                    # Sum confidences per edge so each edge is written once per batch
+                    for relationship in data.relationships:
+                        _add_relationship(relationship_stats, relationship, source_id)
+                    
+                    if len(sources) + len(entity_counts) + len(relationship_stats) >= BATCH_SIZE:
+                        progress.update(len(sources))
+                        self._flush(executor, sources, entity_counts, relationship_stats)
                 
-                # Create relationship edges
-                for relationship in data['relationships']:
-                    success = self.create_relationship_edge(relationship, source_id)
-                    if success:
-                        self.relationship_count += 1
+                progress.update(len(sources))
+                self._flush(executor, sources, entity_counts, relationship_stats)
+            
+            if not self.source_count:
+                logger.warning("Results file is empty")
+                return 0, 0, 0
+            
+            self._mark_graph_updated()
             
             logger.info(f"Knowledge graph built successfully with {self.entity_count} entities, "
                         f"{self.relationship_count} relationships, and {self.source_count} sources")
@@ -236,52 +688,190 @@ class KnowledgeGraphBuilder:
             logger.error(f"Error building knowledge graph: {str(e)}")
             return 0, 0, 0
     
-    def add_dual_process_properties(self):
+    def build_csv_from_results(self, relationship_results_path, output_dir="data/import"):
         """
-        Add properties to relationships for dual process theory views.
+        Write relationship extraction results as CSV files for load_csv_files.
+        
+        Produces sources.csv, one entities_<Label>.csv per entity label and
+        one rels_<Subject>__<TYPE>__<Object>.csv per relationship group, with
+        repeated entity mentions already collapsed into counts.
         
+        Args:
+            relationship_results_path (str): Path to the relationship extraction results
+            output_dir (str): Directory for the CSV files (Neo4j's import directory)
+            
         Returns:
-            int: Number of relationships updated
+            list: Paths of the CSV files written
         """
-        # System 1 properties are based on high frequency/confidence
-        system1_query = """
-        MATCH ()-[r]->()
-        WHERE type(r) <> 'CONTAINS' AND type(r) <> 'EVIDENCE' AND type(r) <> 'MENTIONED_IN'
-        SET r.system1_strength = CASE
-            WHEN r.count > 5 AND r.confidence > 0.7 THEN 'high'
-            WHEN r.count > 2 AND r.confidence > 0.5 THEN 'medium'
-            ELSE 'low'
-        END
-        RETURN count(r) as updated
+        relationship_results_path = os.path.join(project_root, relationship_results_path)
+        output_dir = os.path.join(project_root, output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        
+        writers = {}
+        
+        with ExitStack() as stack:
+            def writer_for(filename, fields):
+                if filename not in writers:
+                    f = stack.enter_context(open(os.path.join(output_dir, filename), 'w', newline='', encoding='utf-8'))
+                    writers[filename] = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+                    writers[filename].writeheader()
+                return writers[filename]
+            
+            for article_id, data in tqdm(_iter_results(relationship_results_path), desc="Writing CSV files",
+                                        mininterval=0.5, miniters=1000):
+                source = self._source_properties(data.article_data)
+                source_id = source['id']
+                writer_for("sources.csv", SOURCE_CSV_FIELDS).writerow(source)
+                
+                entity_counts = Counter((entity.type, entity.text) for entity in data.entities)
+                for (entity_type, name), count in entity_counts.items():
+                    writer_for(f"entities_{entity_type}.csv", ENTITY_CSV_FIELDS).writerow(
+                        {'name': name, 'source_id': source_id, 'cnt': count}
+                    )
+                
+                relationship_stats = _relationship_stats()
+                for relationship in data.relationships:
+                    _add_relationship(relationship_stats, relationship, source_id)
+                
+                for (subject_type, object_type, rel_type, subject, object_entity), stats in relationship_stats.items():
+                    row = _relationship_row(subject, object_entity, stats)
+                    row['evidence_sources'] = CSV_LIST_SEPARATOR.join(str(source) for source in row['evidence_sources'])
+                    row['contexts'] = CSV_LIST_SEPARATOR.join(row['contexts'])
+                    filename = f"rels_{subject_type}__{rel_type}__{object_type}.csv"
+                    writer_for(filename, RELATIONSHIP_CSV_FIELDS).writerow(row)
+        
+        paths = [os.path.join(output_dir, filename) for filename in writers]
+        logger.info(f"Wrote {len(paths)} CSV files to {output_dir}")
+        return paths
+    
+    def load_csv_files(self, csv_paths):
         """
+        Load CSV files written by build_csv_from_results with LOAD CSV.
         
-        # System 2 properties are set initially based on evidence count
-        system2_query = """
-        MATCH ()-[r]->()
-        WHERE type(r) <> 'CONTAINS' AND type(r) <> 'EVIDENCE' AND type(r) <> 'MENTIONED_IN'
-        SET r.system2_relevance = CASE
-            WHEN r.evidence_count > 3 THEN 'high'
-            WHEN r.evidence_count > 1 THEN 'medium'
-            ELSE 'low'
-        END
-        RETURN count(r) as updated
+        The files must be in Neo4j's import directory. Sources are loaded
+        first, then entities, then relationships; each file is committed in
+        transactions of CSV_TRANSACTION_SIZE lines.
+        
+        Args:
+            csv_paths (list): Paths of the CSV files
+            
+        Returns:
+            int: Number of files loaded
         """
+        jobs = []
+        for path in csv_paths:
+            filename = os.path.basename(path)
+            name = filename[:-len('.csv')]
+            
+            try:
+                if name == 'sources':
+                    jobs.append((0, filename, _csv_query(SOURCE_CSV_ROW, SOURCE_CLAUSES), {}))
+                elif name.startswith('entities_'):
+                    entity_type = name[len('entities_'):]
+                    query = _csv_query(ENTITY_CSV_ROW, _entity_clauses(entity_type))
+                    category_id = self._category_ids.get(f"Cardiac {entity_type}s")
+                    jobs.append((1, filename, query, {'category_id': category_id}))
+                elif name.startswith('rels_'):
+                    subject_type, rel_type, object_type = name[len('rels_'):].split('__')
+                    query = _csv_query(RELATIONSHIP_CSV_ROW, _relationship_clauses(subject_type, object_type, rel_type))
+                    jobs.append((2, filename, query, {}))
+                else:
+                    logger.warning(f"Skipping unrecognized CSV file: {filename}")
+            except ValueError as e:
+                logger.warning(f"Skipping {filename}: {str(e)}")
+        
+        jobs.sort(key=lambda job: job[0])
+        
+        # CALL { ... } IN TRANSACTIONS needs an auto-commit transaction
+        with self.driver.session() as session:
+            for phase, filename, query, params in tqdm(jobs, desc="Loading CSV files"):
+                session.run(query, url=f"file:///{filename}", separator=CSV_LIST_SEPARATOR, **params).consume()
+        
+        self._mark_graph_updated()
+        logger.info(f"Loaded {len(jobs)} CSV files")
+        return len(jobs)
+    
+    def add_entity_labels(self):
+        """
+        Add the shared Entity label and primary_label property to entity nodes.
         
-        # Run the queries
-        result1 = self.graph.run(system1_query).data()
-        result2 = self.graph.run(system2_query).data()
+        The views, search and the entity_name_fts index find entities by the
+        Entity label. New entities get both when they are written, and
+        existing ones whenever they are written again, so this is only
+        needed for entities in graphs built before that was the case.
         
-        # Get the counts
-        count1 = result1[0]['updated'] if result1 else 0
-        count2 = result2[0]['updated'] if result2 else 0
+        Returns:
+            int: Number of entity nodes updated
+        """
+        queries = [
+            f"""
+            MATCH (e:{entity_type})
+            WHERE NOT e:Entity OR e.primary_label IS NULL
+            SET e:Entity, e.primary_label = '{entity_type}'
+            RETURN count(e) AS updated
+            """
+            for entity_type in sorted(ENTITY_LABELS)
+        ]
+        
+        def update_all(tx):
+            return sum(tx.run(query).single()['updated'] for query in queries)
+        
+        # Run the queries in one transaction
+        with self.driver.session() as session:
+            count = session.execute_write(update_all)
+        
+        if count:
+            self._mark_graph_updated()
+        logger.info(f"Added the Entity label to {count} entity nodes")
+        
+        return count
+    
+    def add_dual_process_properties(self):
+        """
+        Add properties to relationships for dual process theory views.
         
-        logger.info(f"Added dual process properties to {count1} relationships (System 1)")
-        logger.info(f"Added dual process properties to {count2} relationships (System 2)")
+        New relationships get these properties when they are written, so
+        this is only needed for graphs built before that was the case.
         
-        return max(count1, count2)
+        Returns:
+            int: Number of relationships updated
+        """
+        # System 1 properties are based on high frequency/confidence, System 2
+        # properties on evidence count. Matching each domain relationship type
+        # explicitly avoids scanning CONTAINS and MENTIONED_IN edges.
+        queries = [
+            f"""
+            MATCH ()-[r:{rel_type}]->()
+            SET r.system1_strength = CASE
+                    WHEN r.count > 5 AND r.confidence > 0.7 THEN 'high'
+                    WHEN r.count > 2 AND r.confidence > 0.5 THEN 'medium'
+                    ELSE 'low'
+                END,
+                r.system2_relevance = CASE
+                    WHEN r.evidence_count > 3 THEN 'high'
+                    WHEN r.evidence_count > 1 THEN 'medium'
+                    ELSE 'low'
+                END
+            RETURN count(r) AS updated
+            """
+            for rel_type in DOMAIN_RELATIONSHIP_TYPES
+        ]
+        
+        def update_all(tx):
+            return sum(tx.run(query).single()['updated'] for query in queries)
+        
+        # Run the queries in one transaction
+        with self.driver.session() as session:
+            count = session.execute_write(update_all)
+        
+        self._mark_graph_updated()
+        logger.info(f"Added dual process properties to {count} relationships")
+        
+        return count
 
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
     builder = KnowledgeGraphBuilder()
-    builder.build_graph_from_results("data/processed/extracted_relationships.json")
-    builder.add_dual_process_properties() 
\ No newline at end of file
+    builder.build_graph_from_results("data/processed/extracted_relationships.jsonl")
+    builder.add_entity_labels() 
\ No newline at end of file
@@ -1,154 +1,524 @@
 """
 Module for generating dual process theory views of the cardiology knowledge graph.
 """
+import atexit
+import copy
+import functools
+import hashlib
+import heapq
+import inspect
 import logging
-from pathlib import Path
-import sys
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import List, Optional
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+import msgspec
+from cachetools import TTLCache
+from neo4j import READ_ACCESS
 
-from src.database.database_connector import connector
+from src import configure_logging
+from src.json_utils import dumps
+from src.database.database_connector import get_connector
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Number of query results kept in memory and how long (in seconds) they stay valid
+VIEW_CACHE_SIZE = 512
+VIEW_CACHE_TTL = 300
+
+# How often (in seconds) each process checks whether the graph has been written to
+GRAPH_VERSION_CHECK_INTERVAL = 10
+
+# Characters with a meaning in Lucene query syntax, escaped in search terms
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+_view_cache = TTLCache(maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL)
+# One-hop neighbourhoods shared by all view types, keyed by (entity name, entity type)
+_one_hop_cache = TTLCache(maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL)
+# Cached results already encoded as JSON, with their ETags, keyed like _view_cache
+_json_cache = TTLCache(maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL)
+_view_cache_lock = threading.Lock()
+# Results being computed, keyed by (cache id, key), so concurrent misses for
+# the same key wait for one query instead of each running their own
+_inflight = {}
+
+def _get_or_compute(cache, key, compute):
+    """
+    Get a value from a cache, computing it at most once across concurrent misses.
+    
+    The first caller to miss computes the value; callers that miss while it
+    is running wait for and share its result (or its exception).
+    
+    Args:
+        cache (TTLCache): Cache to look the key up in and store the value to
+        key (tuple): Cache key
+        compute (function): Computes the value when it is not cached
+        
+    Returns:
+        The cached or computed value
+    """
+    flight_key = (id(cache), key)
+    with _view_cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            return value
+        
+        flight = _inflight.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[flight_key] = Future()
+    
+    if not leader:
+        return flight.result()
+    
+    # BaseException too, so a worker interrupted mid-query (e.g. by a timeout)
+    # never leaves the key in flight with waiters blocked on it forever
+    try:
+        value = compute()
+    except BaseException as e:
+        with _view_cache_lock:
+            _inflight.pop(flight_key, None)
+        flight.set_exception(e)
+        raise
+    
+    with _view_cache_lock:
+        cache[key] = value
+        _inflight.pop(flight_key, None)
+    flight.set_result(value)
+    return value
+
+def _cached_view(method):
+    """
+    Cache a DualProcessViews query method by its name and bound arguments.
+    
+    Callers get a deep copy of the cached result, so mutating it does not
+    affect later hits. The wrapper's json attribute returns the result as
+    encoded JSON bytes and an ETag hashed from them instead, which are cached
+    too, so repeat hits skip the copy, the encoding and the hashing.
+    
+    Args:
+        method (function): Method to cache
+        
+    Returns:
+        function: The wrapped method
+    """
+    signature = inspect.signature(method)
+    
+    def cache_key(self, args, kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        return (method.__name__,) + tuple(bound.arguments.values())[1:]
+    
+    def cached_result(self, key, args, kwargs):
+        return _get_or_compute(_view_cache, key, lambda: method(self, *args, **kwargs))
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._check_graph_version()
+        key = cache_key(self, args, kwargs)
+        return copy.deepcopy(cached_result(self, key, args, kwargs))
+    
+    def as_json(self, *args, **kwargs):
+        self._check_graph_version()
+        key = cache_key(self, args, kwargs)
+        with _view_cache_lock:
+            encoded = _json_cache.get(key)
+        if encoded is None:
+            body = dumps(cached_result(self, key, args, kwargs))
+            encoded = (body, json_etag(body))
+            with _view_cache_lock:
+                _json_cache[key] = encoded
+        return encoded
+    
+    wrapper.json = as_json
+    return wrapper
+
+def json_etag(body):
+    """
+    Compute an ETag for an encoded JSON body.
+    
+    Args:
+        body (bytes): Encoded JSON
+        
+    Returns:
+        str: Hex digest of the body
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def invalidate(entity_name=None):
+    """
+    Drop cached query results after the graph has been written to.
+    
+    Args:
+        entity_name (str, optional): Entity whose views changed; all cached
+                                     results are dropped if not given
+    """
+    with _view_cache_lock:
+        if entity_name is None:
+            _view_cache.clear()
+            _json_cache.clear()
+            _one_hop_cache.clear()
+            return
+        
+        for key in list(_one_hop_cache.keys()):
+            if key[0] == entity_name:
+                _one_hop_cache.pop(key, None)
+        
+        # Search results may include the entity under any search term
+        for cache in (_view_cache, _json_cache):
+            for key in list(cache.keys()):
+                if key[1] == entity_name or key[0] == 'search_entities':
+                    cache.pop(key, None)
+
+# Time of the last graph write, stamped on the Root node by KnowledgeGraphBuilder
+GRAPH_VERSION_QUERY = """
+    MATCH (root:Root)
+    RETURN max(root.updated_at) AS updated_at
+    """
+
+# All non-evidence relationships around an entity, in either direction, with
+# every property the views filter and order on. One undirected match covers
+# both directions; edges keep their direction through their start and end nodes.
+ONE_HOP_QUERY = """
+    MATCH (n:Entity {name: $entity_name})
+    WHERE $entity_type IS NULL OR n.primary_label = $entity_type
+    MATCH (n)-[r]-(other)
+    WHERE NOT type(r) IN ['MENTIONED_IN', 'EVIDENCE']
+    
+    WITH n, collect(DISTINCT other) AS neighbors,
+         collect({source: startNode(r).name, target: endNode(r).name,
+                  type: type(r),
+                  count: coalesce(r.count, 1),
+                  confidence: coalesce(r.confidence, 0.5),
+                  evidence_count: coalesce(r.evidence_count, 1),
+                  system1_strength: coalesce(r.system1_strength, 'low'),
+                  system2_relevance: coalesce(r.system2_relevance, 'low')}) AS edges
+    
+    RETURN [node IN [n] + [other IN neighbors WHERE other <> n] |
+            {id: node.name, label: node.name,
+             type: coalesce(node.primary_label, labels(node)[0]),
+             group: coalesce(node.primary_label, labels(node)[0]),
+             central: node = n, value: CASE WHEN node = n THEN 20 ELSE 10 END}] as nodes,
+           edges
+    """
+
+class Node(msgspec.Struct, frozen=True):
+    """A node of a one-hop neighbourhood, shaped for the views."""
+    id: str
+    label: str
+    type: Optional[str]
+    group: Optional[str]
+    central: bool
+    value: int
+
+class Edge(msgspec.Struct, frozen=True):
+    """A relationship of a one-hop neighbourhood with its scoring properties."""
+    source: str
+    target: str
+    type: str
+    count: int
+    confidence: float
+    evidence_count: int
+    system1_strength: str
+    system2_relevance: str
+
+_STRENGTH_RANK = {'high': 2, 'medium': 1, 'low': 0}
+
+# How each view type selects, orders and shapes the one-hop edges
+VIEWS = {
+    # High-frequency, high-confidence relationships
+    'system1': {
+        'select': lambda edge: edge.system1_strength in ('high', 'medium'),
+        'order': lambda edge: (-edge.count, -edge.confidence),
+        'link': lambda edge: {
+            'source': edge.source,
+            'target': edge.target,
+            'label': edge.type,
+            'type': edge.type,
+            'value': edge.count,
+            'strength': edge.system1_strength,
+            'confidence': edge.confidence,
+        },
+        'description': "System 1 (Intuitive) view centered on {entity_name} showing {count} high-confidence relationships.",
+    },
+    # All relationships, most relevant and best evidenced first
+    'system2': {
+        'select': None,
+        'order': lambda edge: (-_STRENGTH_RANK.get(edge.system2_relevance, 0), -edge.evidence_count),
+        'link': lambda edge: {
+            'source': edge.source,
+            'target': edge.target,
+            'label': edge.type,
+            'type': edge.type,
+            'value': edge.count,
+            'relevance': edge.system2_relevance,
+            'evidence_count': edge.evidence_count,
+        },
+        'description': "System 2 (Analytical) view centered on {entity_name} showing {count} relationships.",
+    },
+    # All relationships, most frequent first
+    'complete': {
+        'select': None,
+        'order': lambda edge: -edge.count,
+        'link': lambda edge: {
+            'source': edge.source,
+            'target': edge.target,
+            'label': edge.type,
+            'type': edge.type,
+            'value': edge.count,
+            'system1': edge.system1_strength in ('high', 'medium'),
+            'system2': edge.system2_relevance in ('high', 'medium'),
+            'system1_strength': edge.system1_strength,
+            'system2_relevance': edge.system2_relevance,
+            'confidence': edge.confidence,
+        },
+        'description': "Complete view centered on {entity_name} showing {count} relationships.",
+    },
+}
+
+# An entity with the sources that mention it and its most frequent
+# neighbours in either direction, in one round trip
+ENTITY_INFO_QUERY = """
+    MATCH (n:Entity {name: $entity_name})
+    WHERE $entity_type IS NULL OR n.primary_label = $entity_type
+    
+    // A pattern comprehension gives an empty list, not a null-padded row,
+    // for entities without sources
+    WITH n, [(n)-[m:MENTIONED_IN]->(s:Source) | {
+        source_id: s.id,
+        source_title: s.title,
+        source_type: s.type,
+        mention_count: coalesce(m.count, 1)
+    }] as sources
+    
+    // Aggregating inside the subquery keeps entities without neighbours
+    CALL {
+        WITH n
+        MATCH (n)-[r]-(other)
+        WHERE NOT type(r) IN ['MENTIONED_IN', 'EVIDENCE']
+        
+        WITH r, other, coalesce(r.count, 1) AS frequency
+        ORDER BY frequency DESC
+        LIMIT 10
+        
+        RETURN collect({
+            entity_name: other.name,
+            entity_type: coalesce(other.primary_label, labels(other)[0]),
+            relationship: type(r),
+            frequency: frequency
+        }) as related_entities
+    }
+    
+    RETURN n.name as name,
+           n.primary_label as type,
+           n.frequency as total_frequency,
+           sources,
+           related_entities
+    """
+
+# Prefix search over the full-text index on entity names
+SEARCH_QUERY = """
+    CALL db.index.fulltext.queryNodes('entity_name_fts', $search_query)
+    YIELD node, score
+    
+    RETURN node.name as name,
+           node.primary_label as type,
+           node.frequency as frequency
+    
+    ORDER BY score DESC, node.frequency DESC
+    LIMIT $limit
+    """
+
 class DualProcessViews:
     """Class to generate dual process theory views of the knowledge graph."""
     
     def __init__(self):
         """Initialize the dual process views generator."""
-        self.graph = connector.get_connection()
+        self.driver = get_connector().get_connection()
+        
+        # Sessions aren't thread-safe, so each thread keeps its own read session
+        self._local = threading.local()
+        self._sessions = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        atexit.register(self.close)
+        
+        # Last graph write seen, and when it was last checked
+        self._graph_version = None
+        self._version_checked = float('-inf')
+        self._version_lock = threading.Lock()
     
-    def generate_system1_view(self, entity_name, entity_type=None, limit=50):
+    def _session(self):
         """
-        Generate System 1 (intuitive) view centered on a specific entity.
+        Get the calling thread's read session, opening it on first use.
         
-        System 1 view focuses on high-frequency, high-confidence relationships
-        that represent common associations medical students should learn.
+        Returns:
+            Session: A neo4j Session in read access mode
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None or session.closed():
+            session = self.driver.session(default_access_mode=READ_ACCESS)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.add(session)
+        return session
+    
+    def close(self):
+        """
+        Close the read sessions opened by all threads.
+        """
+        with self._sessions_lock:
+            for session in list(self._sessions):
+                session.close()
+            self._sessions.clear()
+    
+    def _run(self, query, **params):
+        """
+        Run a read query in this thread's session and return its rows.
+        
+        Args:
+            query (str): Cypher query
+            **params: Query parameters
+            
+        Returns:
+            list: Result rows as dictionaries
+        """
+        return self._session().run(query, **params).data()
+    
+    def _single(self, query, **params):
+        """
+        Run a read query that returns at most one record.
+        
+        Args:
+            query (str): Cypher query
+            **params: Query parameters
+            
+        Returns:
+            Record: The result record, or None if the query returned no rows
+        """
+        return self._session().run(query, **params).single()
+    
+    def _check_graph_version(self):
+        """
+        Drop all cached results if the graph has been written to since the last check.
+        
+        The graph builder runs in a different process, so it cannot clear
+        this process's caches; it stamps the Root node instead, which is read
+        here at most every GRAPH_VERSION_CHECK_INTERVAL seconds.
+        """
+        now = time.monotonic()
+        with self._version_lock:
+            if now - self._version_checked < GRAPH_VERSION_CHECK_INTERVAL:
+                return
+            self._version_checked = now
+        
+        try:
+            record = self._single(GRAPH_VERSION_QUERY)
+        except Exception as e:
+            logger.warning("Could not check the graph version: %s", e)
+            return
+        
+        version = record['updated_at'] if record else None
+        if version != self._graph_version:
+            self._graph_version = version
+            invalidate()
+    
+    def json(self, method_name, *args, **kwargs):
+        """
+        Call a cached query method and get its result as encoded JSON.
+        
+        Args:
+            method_name (str): Name of a cached method, e.g. 'search_entities'
+            *args: Positional arguments for the method
+            **kwargs: Keyword arguments for the method
+            
+        Returns:
+            tuple: (the method's result encoded as JSON, ETag of the encoding)
+        """
+        return getattr(type(self), method_name).json(self, *args, **kwargs)
+    
+    def _one_hop(self, entity_name, entity_type):
+        """
+        Get the one-hop neighbourhood of an entity, from the cache when possible.
         
         Args:
             entity_name (str): Name of the central entity
             entity_type (str, optional): Type of the entity (if known)
-            limit (int): Maximum number of relationships to include
             
         Returns:
-            dict: System 1 view data
+            tuple: (deduplicated Node list, Edge list); both empty if the entity
+                   has no relationships
         """
-        # Construct the type constraint if provided
-        type_constraint = ""
-        if entity_type:
-            type_constraint = f"AND n:{entity_type}"
-        
-        # Query to get System 1 relationships
-        query = f"""
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (n)-[r]->(target) 
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        AND (r.system1_strength = 'high' OR r.system1_strength = 'medium')
-        
-        WITH n, r, target
-        ORDER BY r.count DESC, r.confidence DESC
-        LIMIT {limit}
-        
-        RETURN n.name as source_name, 
-               labels(n)[0] as source_type,
-               type(r) as relationship,
-               r.count as relationship_count,
-               r.confidence as relationship_confidence,
-               r.system1_strength as relationship_strength,
-               target.name as target_name,
-               labels(target)[0] as target_type
-        
-        UNION
-        
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (source)-[r]->(n)
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        AND (r.system1_strength = 'high' OR r.system1_strength = 'medium')
-        
-        WITH n, r, source
-        ORDER BY r.count DESC, r.confidence DESC
-        LIMIT {limit}
-        
-        RETURN source.name as source_name,
-               labels(source)[0] as source_type,
-               type(r) as relationship,
-               r.count as relationship_count,
-               r.confidence as relationship_confidence,
-               r.system1_strength as relationship_strength,
-               n.name as target_name,
-               labels(n)[0] as target_type
+        def query():
+            record = self._single(ONE_HOP_QUERY, entity_name=entity_name, entity_type=entity_type)
+            if not record:
+                return ([], [])
+            
+            # Cached as slotted structs, which take far less memory than dicts
+            nodes, edges = record
+            return (msgspec.convert(nodes, List[Node], strict=False),
+                    msgspec.convert(edges, List[Edge], strict=False))
+        
+        # Requests for different views of the same entity often miss together
+        # on a cold cache, so they share a single query
+        return _get_or_compute(_one_hop_cache, (entity_name, entity_type), query)
+    
+    def _build_view(self, view_type, entity_name, entity_type, limit):
         """
+        Select, order and package the one-hop edges of an entity for a view type.
         
-        results = self.graph.run(query, entity_name=entity_name).data()
-        
-        # Format the results
-        nodes = {}
-        links = []
-        
-        for row in results:
-            if not row['relationship']:
-                continue
-                
-            # Add source node if not already in nodes
-            if row['source_name'] not in nodes:
-                nodes[row['source_name']] = {
-                    'id': row['source_name'],
-                    'label': row['source_name'],
-                    'type': row['source_type'],
-                    'group': row['source_type'],
-                }
-            
-            # Add target node if not already in nodes
-            if row['target_name'] not in nodes:
-                nodes[row['target_name']] = {
-                    'id': row['target_name'],
-                    'label': row['target_name'],
-                    'type': row['target_type'],
-                    'group': row['target_type'],
-                }
+        Args:
+            view_type (str): Key of VIEWS (system1, system2, complete)
+            entity_name (str): Name of the central entity
+            entity_type (str, optional): Type of the entity (if known)
+            limit (int): Maximum number of relationships to include
             
-            # Add the link
-            links.append({
-                'source': row['source_name'],
-                'target': row['target_name'],
-                'label': row['relationship'],
-                'type': row['relationship'],
-                'value': row['relationship_count'] or 1,
-                'strength': row['relationship_strength'] or 'low',
-                'confidence': row['relationship_confidence'] or 0.5,
-            })
-        
-        # Convert nodes dict to list
-        nodes_list = list(nodes.values())
-        
-        # Mark the central node
-        for node in nodes_list:
-            if node['id'] == entity_name:
-                node['central'] = True
-                node['value'] = 20  # Make central node larger
-            else:
-                node['central'] = False
-                node['value'] = 10
-        
-        # Create the view
-        view = {
-            'viewType': 'system1',
+        Returns:
+            dict: View data
+        """
+        view = VIEWS[view_type]
+        nodes, edges = self._one_hop(entity_name, entity_type)
+        
+        # nsmallest falls back to a single sort when given a list no longer
+        # than the limit, which is the common case for large-limit views
+        candidates = list(filter(view['select'], edges))
+        edges = heapq.nsmallest(limit, candidates, key=view['order'])
+        links = list(map(view['link'], edges))
+        
+        # Keep the nodes at either end of the selected links
+        names = {name for edge in edges for name in (edge.source, edge.target)}
+        nodes_list = [msgspec.structs.asdict(node) for node in nodes if node.id in names]
+        
+        return {
+            'viewType': view_type,
             'centralEntity': entity_name,
             'entityType': entity_type,
             'nodes': nodes_list,
             'links': links,
-            'description': f"System 1 (Intuitive) view centered on {entity_name} showing {len(links)} high-confidence relationships."
+            'description': view['description'].format(entity_name=entity_name, count=len(links))
         }
+    
+    @_cached_view
+    def generate_system1_view(self, entity_name, entity_type=None, limit=50):
+        """
+        Generate System 1 (intuitive) view centered on a specific entity.
+        
+        System 1 view focuses on high-frequency, high-confidence relationships
+        that represent common associations medical students should learn.
         
-        return view
+        Args:
+            entity_name (str): Name of the central entity
+            entity_type (str, optional): Type of the entity (if known)
+            limit (int): Maximum number of relationships to include
+            
+        Returns:
+            dict: System 1 view data
+        """
+        return self._build_view('system1', entity_name, entity_type, limit)
     
+    @_cached_view
     def generate_system2_view(self, entity_name, entity_type=None, limit=50):
         """
         Generate System 2 (analytical) view centered on a specific entity.
@@ -164,113 +534,9 @@ class DualProcessViews:
         Returns:
             dict: System 2 view data
         """
-        # Construct the type constraint if provided
-        type_constraint = ""
-        if entity_type:
-            type_constraint = f"AND n:{entity_type}"
-        
-        # Query to get System 2 relationships
-        query = f"""
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (n)-[r]->(target)
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        
-        WITH n, r, target
-        ORDER BY r.system2_relevance DESC, r.evidence_count DESC
-        LIMIT {limit}
-        
-        RETURN n.name as source_name,
-               labels(n)[0] as source_type,
-               type(r) as relationship,
-               r.count as relationship_count,
-               r.evidence_count as evidence_count,
-               r.system2_relevance as relationship_relevance,
-               target.name as target_name,
-               labels(target)[0] as target_type
-        
-        UNION
-        
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (source)-[r]->(n)
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        
-        WITH n, r, source
-        ORDER BY r.system2_relevance DESC, r.evidence_count DESC
-        LIMIT {limit}
-        
-        RETURN source.name as source_name,
-               labels(source)[0] as source_type,
-               type(r) as relationship,
-               r.count as relationship_count,
-               r.evidence_count as evidence_count,
-               r.system2_relevance as relationship_relevance,
-               n.name as target_name,
-               labels(n)[0] as target_type
-        """
-        
-        results = self.graph.run(query, entity_name=entity_name).data()
-        
-        # Format the results
-        nodes = {}
-        links = []
-        
-        for row in results:
-            if not row['relationship']:
-                continue
-                
-            # Add source node if not already in nodes
-            if row['source_name'] not in nodes:
-                nodes[row['source_name']] = {
-                    'id': row['source_name'],
-                    'label': row['source_name'],
-                    'type': row['source_type'],
-                    'group': row['source_type'],
-                }
-            
-            # Add target node if not already in nodes
-            if row['target_name'] not in nodes:
-                nodes[row['target_name']] = {
-                    'id': row['target_name'],
-                    'label': row['target_name'],
-                    'type': row['target_type'],
-                    'group': row['target_type'],
-                }
-            
-            # Add the link
-            links.append({
-                'source': row['source_name'],
-                'target': row['target_name'],
-                'label': row['relationship'],
-                'type': row['relationship'],
-                'value': row['relationship_count'] or 1,
-                'relevance': row['relationship_relevance'] or 'low',
-                'evidence_count': row['evidence_count'] or 1,
-            })
-        
-        # Convert nodes dict to list
-        nodes_list = list(nodes.values())
-        
-        # Mark the central node
-        for node in nodes_list:
-            if node['id'] == entity_name:
-                node['central'] = True
-                node['value'] = 20  # Make central node larger
-            else:
-                node['central'] = False
-                node['value'] = 10
-        
-        # Create the view
-        view = {
-            'viewType': 'system2',
-            'centralEntity': entity_name,
-            'entityType': entity_type,
-            'nodes': nodes_list,
-            'links': links,
-            'description': f"System 2 (Analytical) view centered on {entity_name} showing {len(links)} relationships."
-        }
-        
-        return view
+        return self._build_view('system2', entity_name, entity_type, limit)
     
+    @_cached_view
     def generate_complete_view(self, entity_name, entity_type=None, limit=100):
         """
         Generate complete view centered on a specific entity.
@@ -286,122 +552,30 @@ class DualProcessViews:
         Returns:
             dict: Complete view data
         """
-        # Construct the type constraint if provided
-        type_constraint = ""
-        if entity_type:
-            type_constraint = f"AND n:{entity_type}"
-        
-        # Query to get all relevant relationships
-        query = f"""
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (n)-[r]->(target)
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        
-        WITH n, r, target
-        ORDER BY r.count DESC
-        LIMIT {limit}
-        
-        RETURN n.name as source_name,
-               labels(n)[0] as source_type,
-               type(r) as relationship,
-               r.count as relationship_count,
-               r.confidence as relationship_confidence,
-               r.system1_strength as system1_strength,
-               r.system2_relevance as system2_relevance,
-               target.name as target_name,
-               labels(target)[0] as target_type
-        
-        UNION
-        
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (source)-[r]->(n)
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        
-        WITH n, r, source
-        ORDER BY r.count DESC
-        LIMIT {limit}
-        
-        RETURN source.name as source_name,
-               labels(source)[0] as source_type,
-               type(r) as relationship,
-               r.count as relationship_count,
-               r.confidence as relationship_confidence,
-               r.system1_strength as system1_strength,
-               r.system2_relevance as system2_relevance,
-               n.name as target_name,
-               labels(n)[0] as target_type
+        return self._build_view('complete', entity_name, entity_type, limit)
+    
+    @_cached_view
+    def generate_all_views(self, entity_name, entity_type=None, limit=50):
         """
+        Generate the System 1, System 2 and complete views of an entity together.
         
-        results = self.graph.run(query, entity_name=entity_name).data()
-        
-        # Format the results
-        nodes = {}
-        links = []
-        
-        for row in results:
-            if not row['relationship']:
-                continue
-                
-            # Add source node if not already in nodes
-            if row['source_name'] not in nodes:
-                nodes[row['source_name']] = {
-                    'id': row['source_name'],
-                    'label': row['source_name'],
-                    'type': row['source_type'],
-                    'group': row['source_type'],
-                }
-            
-            # Add target node if not already in nodes
-            if row['target_name'] not in nodes:
-                nodes[row['target_name']] = {
-                    'id': row['target_name'],
-                    'label': row['target_name'],
-                    'type': row['target_type'],
-                    'group': row['target_type'],
-                }
-            
-            # Determine view attributes
-            is_system1 = row['system1_strength'] in ['high', 'medium']
-            is_system2 = row['system2_relevance'] in ['high', 'medium']
+        All three are projected from a single one-hop neighbourhood query and
+        cached as one entry.
+        
+        Args:
+            entity_name (str): Name of the central entity
+            entity_type (str, optional): Type of the entity (if known)
+            limit (int): Maximum number of relationships in each view
             
-            # Add the link
-            links.append({
-                'source': row['source_name'],
-                'target': row['target_name'],
-                'label': row['relationship'],
-                'type': row['relationship'],
-                'value': row['relationship_count'] or 1,
-                'system1': is_system1,
-                'system2': is_system2,
-                'system1_strength': row['system1_strength'] or 'low',
-                'system2_relevance': row['system2_relevance'] or 'low',
-                'confidence': row['relationship_confidence'] or 0.5,
-            })
-        
-        # Convert nodes dict to list
-        nodes_list = list(nodes.values())
-        
-        # Mark the central node
-        for node in nodes_list:
-            if node['id'] == entity_name:
-                node['central'] = True
-                node['value'] = 20  # Make central node larger
-            else:
-                node['central'] = False
-                node['value'] = 10
-        
-        # Create the view
-        view = {
-            'viewType': 'complete',
-            'centralEntity': entity_name,
-            'entityType': entity_type,
-            'nodes': nodes_list,
-            'links': links,
-            'description': f"Complete view centered on {entity_name} showing {len(links)} relationships."
+        Returns:
+            dict: Views keyed by view type (system1, system2, complete)
+        """
+        return {
+            view_type: self._build_view(view_type, entity_name, entity_type, limit)
+            for view_type in ('system1', 'system2', 'complete')
         }
-        
-        return view
     
+    @_cached_view
     def get_entity_info(self, entity_name, entity_type=None):
         """
         Get detailed information about an entity.
@@ -413,69 +587,14 @@ class DualProcessViews:
         Returns:
             dict: Entity information
         """
-        # Construct the type constraint if provided
-        type_constraint = ""
-        params = {"entity_name": entity_name}
-        
-        if entity_type:
-            type_constraint = f"AND n:{entity_type}"
-        
-        # Query to get entity information
-        query = f"""
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (n)-[r:MENTIONED_IN]->(s:Source)
-        
-        WITH n, collect({{
-            source_id: s.id,
-            source_title: s.title,
-            source_type: s.type,
-            mention_count: r.count
-        }}) as sources
-        
-        RETURN n.name as name,
-               labels(n)[0] as type,
-               n.frequency as total_frequency,
-               sources
-        """
-        
-        result = self.graph.run(query, **params).data()
+        entity_info = self._single(ENTITY_INFO_QUERY, entity_name=entity_name, entity_type=entity_type)
         
-        if not result:
+        if entity_info is None:
             return {
                 'found': False,
                 'message': f"Entity {entity_name} not found"
             }
         
-        entity_info = result[0]
-        
-        # Get related entities
-        related_query = f"""
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (n)-[r]->(target)
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        
-        RETURN target.name as entity_name,
-               labels(target)[0] as entity_type,
-               type(r) as relationship,
-               r.count as frequency
-               
-        UNION
-        
-        MATCH (n {{name: $entity_name}}){type_constraint}
-        OPTIONAL MATCH (source)-[r]->(n)
-        WHERE type(r) <> 'MENTIONED_IN' AND type(r) <> 'EVIDENCE'
-        
-        RETURN source.name as entity_name,
-               labels(source)[0] as entity_type,
-               type(r) as relationship,
-               r.count as frequency
-        
-        ORDER BY frequency DESC
-        LIMIT 10
-        """
-        
-        related_entities = self.graph.run(related_query, **params).data()
-        
         # Format the response
         info = {
             'found': True,
@@ -483,11 +602,12 @@ class DualProcessViews:
             'type': entity_info['type'],
             'frequency': entity_info['total_frequency'],
             'sources': entity_info['sources'],
-            'related_entities': related_entities
+            'related_entities': entity_info['related_entities']
         }
         
         return info
     
+    @_cached_view
     def search_entities(self, search_term, limit=10):
         """
         Search for entities in the knowledge graph.
@@ -499,26 +619,18 @@ class DualProcessViews:
         Returns:
             list: Matching entities
         """
-        # Query to search for entities by name
-        query = f"""
-        MATCH (n)
-        WHERE n.name CONTAINS $search_term
-        AND NOT n:Category AND NOT n:Source AND NOT n:Root AND NOT n:RelationshipSchema
-        
-        RETURN n.name as name,
-               labels(n)[0] as type,
-               n.frequency as frequency
-        
-        ORDER BY n.frequency DESC
-        LIMIT {limit}
-        """
+        # Match entities whose name has a word starting with each search word
+        words = [_LUCENE_SPECIAL.sub(r'\\\1', word) for word in search_term.split()]
+        if not words:
+            return []
         
-        results = self.graph.run(query, search_term=search_term).data()
+        results = self._run(SEARCH_QUERY, search_query=' AND '.join(f"{word}*" for word in words), limit=limit)
         
         return results
 
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
     views = DualProcessViews()
     
     # Example for "heart failure"
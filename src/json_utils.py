@@ -0,0 +1,221 @@
+"""
+JSON serialization helpers that use orjson and ijson when they are installed.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson.backends.yajl2_c as ijson
+except ImportError:
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+
+def dumps(data, indent=False, sort_keys=False):
+    """
+    Serialize data to UTF-8 encoded JSON.
+
+    Args:
+        data: JSON-serializable object
+        indent (bool): Whether to pretty-print with a two-space indent
+        sort_keys (bool): Whether to sort object keys, for canonical output
+
+    Returns:
+        bytes: Encoded JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, option=option)
+
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None,
+                      sort_keys=sort_keys).encode('utf-8')
+
+
+def loads(data):
+    """
+    Deserialize a JSON document.
+
+    Args:
+        data (bytes or str): Encoded JSON document
+
+    Returns:
+        The decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+@contextmanager
+def _atomic_open(path, append=False, keep_partial=False):
+    """
+    Open a temporary file for writing that replaces path once closed.
+
+    Readers never see a partially written file, and a failed write leaves
+    any previous file at path in place.
+
+    Args:
+        path (str): Destination file path
+        append (bool): Whether to add to the temporary file of an earlier
+                       failed write instead of starting a new one
+        keep_partial (bool): Whether to keep the temporary file, rather than
+                             remove it, if the write fails
+
+    Yields:
+        file: Binary file object to write to
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'ab' if append else 'wb') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if not keep_partial and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path, data, indent=True):
+    """
+    Write data to a JSON file in a single write call.
+
+    Args:
+        path (str): Destination file path
+        data: JSON-serializable object
+        indent (bool): Whether to pretty-print with a two-space indent
+    """
+    with _atomic_open(path) as f:
+        f.write(dumps(data, indent=indent))
+
+
+def write_jsonl(path, records, resume=False):
+    """
+    Write records to a newline-delimited JSON file, one record per line.
+
+    If the write fails, the lines written so far are kept in path.tmp, and
+    a later call with resume=True appends to them.
+
+    Args:
+        path (str): Destination file path
+        records (iterable): JSON-serializable records
+        resume (bool): Whether to continue the lines kept by a failed write
+    """
+    with _atomic_open(path, append=resume, keep_partial=True) as f:
+        for record in records:
+            f.write(dumps(record) + b'\n')
+
+
+def write_json_items(path, items, resume=False):
+    """
+    Write key/value pairs as one JSON object, encoding one value at a time.
+
+    If path ends in .jsonl, each pair is instead written as its own line,
+    with the key stored under "id" alongside the fields of the value. Such
+    a write can be resumed after a failure; see read_partial_json_items.
+
+    Args:
+        path (str): Destination file path
+        items (iterable): (key, JSON-serializable dict value) pairs
+        resume (bool): Whether to append to the items kept by a failed
+                       .jsonl write rather than start over
+    """
+    if path.endswith('.jsonl'):
+        write_jsonl(path, (dict(id=str(key), **value) for key, value in items), resume=resume)
+        return
+
+    with _atomic_open(path) as f:
+        f.write(b'{')
+        separator = b'\n'
+        for key, value in items:
+            f.write(separator + dumps(str(key)) + b': ' + dumps(value))
+            separator = b',\n'
+        f.write(b'\n}\n')
+
+
+def iter_json_items(path):
+    """
+    Iterate over the key/value pairs of a JSON file holding one object.
+
+    The file is streamed with ijson when it is installed, so only one value
+    is held in memory at a time. Files ending in .jsonl are read line by
+    line, as written by write_json_items.
+
+    Args:
+        path (str): Path to the JSON or JSONL file
+
+    Yields:
+        tuple: (key, decoded value)
+    """
+    if path.endswith('.jsonl'):
+        for record in read_jsonl(path):
+            yield record.pop('id'), record
+        return
+
+    if ijson is None:
+        with open(path, 'rb') as f:
+            yield from loads(f.read()).items()
+        return
+
+    with open(path, 'rb') as f:
+        # Floats rather than Decimals, which neither json nor Neo4j accept
+        yield from ijson.kvitems(f, '', use_float=True)
+
+
+def read_partial_json_items(path):
+    """
+    Read the key/value pairs a failed .jsonl write_json_items call kept.
+
+    A last line cut off mid-write is removed from the partial file, so a
+    resumed write continues after the last complete item.
+
+    Args:
+        path (str): Destination file path of the failed write
+
+    Returns:
+        list: (key, decoded value) pairs, empty if there is nothing to resume
+    """
+    tmp_path = f"{path}.tmp"
+    if not path.endswith('.jsonl') or not os.path.exists(tmp_path):
+        return []
+
+    items = []
+    with open(tmp_path, 'r+b') as f:
+        complete = 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            record = loads(line)
+            items.append((record.pop('id'), record))
+            complete += len(line)
+        f.truncate(complete)
+
+    return items
+
+
+def read_jsonl(path):
+    """
+    Read records from a newline-delimited JSON file.
+
+    Args:
+        path (str): Path to the JSONL file
+
+    Yields:
+        The decoded record on each non-empty line
+    """
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
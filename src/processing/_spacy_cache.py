@@ -0,0 +1,37 @@
+"""
+Shared, cached loading of spaCy models for the extraction modules.
+"""
+import functools
+import logging
+
+import spacy
+
+logger = logging.getLogger(__name__)
+
+# Pipeline components whose output extraction never reads. The ner component
+# of the en_core_web pipelines has its own embedding layer, so the shared
+# tok2vec can go too.
+UNUSED_PIPES = ("tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer")
+
+@functools.lru_cache(maxsize=4)
+def _load_nlp(model_name, disable=UNUSED_PIPES):
+    """
+    Load a spaCy model once per (model_name, disable) combination.
+
+    The returned pipeline is shared by every caller with the same arguments,
+    so components added to it must be added only if not already present.
+    When the parser is disabled, a rule-based sentencizer is added here, once,
+    so every caller's documents have sentence boundaries.
+
+    Args:
+        model_name (str): Name of the spaCy model to load
+        disable (tuple): Names of the components to disable
+
+    Returns:
+        Language: The loaded pipeline
+    """
+    nlp = spacy.load(model_name, disable=list(disable))
+    if "parser" not in nlp.pipe_names and "sentencizer" not in nlp.pipe_names:
+        nlp.add_pipe("sentencizer")
+    logger.info(f"Loaded spaCy model: {model_name} (active pipes: {', '.join(nlp.pipe_names)})")
+    return nlp
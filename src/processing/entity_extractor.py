@@ -1,28 +1,25 @@
 """
 Module for extracting cardiology-related entities from medical texts.
 """
-import spacy
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import json
 import re
-from pathlib import Path
-import sys
-from collections import Counter
 import pandas as pd
 from tqdm import tqdm
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+from src import configure_logging, project_root
+from src.json_utils import loads, read_jsonl, read_partial_json_items, write_json_items
+from src.processing._spacy_cache import UNUSED_PIPES, _load_nlp
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Texts per nlp.pipe batch, and worker processes used by process_directory.
+# Multiprocessing only pays off on large CPU-only runs, so it is opt-in.
+SPACY_BATCH_SIZE = int(os.environ.get("SPACY_BATCH_SIZE", 64))
+SPACY_N_PROCESS = int(os.environ.get("SPACY_N_PROCESS", 1))
+
 class CardiologyEntityExtractor:
     """Class to extract cardiology-related entities from medical texts."""
     
@@ -33,9 +30,10 @@ class CardiologyEntityExtractor:
         Args:
             model_name (str): Name of the spaCy model to use
         """
+        self.model_name = model_name
+        
         try:
-            self.nlp = spacy.load(model_name)
-            logger.info(f"Loaded spaCy model: {model_name}")
+            self.nlp = _load_nlp(model_name, UNUSED_PIPES)
         except Exception as e:
             logger.error(f"Error loading spaCy model: {str(e)}")
             raise
@@ -94,14 +92,25 @@ class CardiologyEntityExtractor:
             ]
         }
         
-        # Create an entity ruler for cardiology terms
-        self.ruler = self.nlp.add_pipe("entity_ruler", before="ner")
+        self._cardio_labels = frozenset(self.cardio_terms.keys())
+        
+        # The cached model is shared, so another extractor may already have
+        # added the ruler and its patterns
+        if "entity_ruler" in self.nlp.pipe_names:
+            self.ruler = self.nlp.get_pipe("entity_ruler")
+            return
+        
+        # Create an entity ruler for cardiology terms. Phrase patterns are
+        # matched by its PhraseMatcher on the LOWER attribute, so matching is
+        # case-insensitive and pattern docs only need the tokenizer.
+        self.ruler = self.nlp.add_pipe("entity_ruler", before="ner",
+                                       config={"phrase_matcher_attr": "LOWER"})
         
         # Add patterns for each entity category
         patterns = []
         for category, terms in self.cardio_terms.items():
             for term in terms:
-                patterns.append({"label": category, "pattern": term.lower()})
+                patterns.append({"label": category, "pattern": term})
         
         self.ruler.add_patterns(patterns)
         logger.info(f"Added {len(patterns)} cardiology-specific entity patterns")
@@ -119,22 +128,91 @@ class CardiologyEntityExtractor:
         if not text or not isinstance(text, str):
             return []
         
-        doc = self.nlp(text)
+        return self._entities_from_doc(self.nlp(text))
+    
+    def _entities_from_doc(self, doc):
+        """
+        Collect the cardiology entities of a processed document.
+        
+        Args:
+            doc (Doc): spaCy document
+            
+        Returns:
+            list: List of extracted entities with details
+        """
         entities = []
         
         for ent in doc.ents:
             # Only include entities with our cardiology labels
-            if ent.label_ in self.cardio_terms.keys():
+            if ent.label_ in self._cardio_labels:
                 entities.append({
                     'text': ent.text,
                     'type': ent.label_,
                     'start': ent.start_char,
-                    'end': ent.end_char,
-                    'context': text[max(0, ent.start_char-50):min(len(text), ent.end_char+50)]
+                    'end': ent.end_char
                 })
         
         return entities
     
+    def entity_context(self, text, entity, window=50):
+        """
+        Get the text surrounding an entity.
+        
+        Entity records only carry character offsets, so their context is
+        sliced from the article text when it is needed.
+        
+        Args:
+            text (str): Text the entity was extracted from, as built by _article_text
+            entity (dict): Extracted entity
+            window (int): Number of characters to include on each side
+            
+        Returns:
+            str: The entity with up to window characters either side
+        """
+        return text[max(0, entity['start'] - window):entity['end'] + window]
+    
+    def _article_text(self, article_data):
+        """
+        Build the text to extract entities from for an article record.
+        
+        Args:
+            article_data (dict): Article record
+            
+        Returns:
+            str: Title, abstract and content or full text, separated by blank lines
+        """
+        # Prepare text for processing
+        text_parts = []
+        
+        # Add title
+        if 'title' in article_data and article_data['title']:
+            text_parts.append(article_data['title'])
+        
+        # Add abstract
+        if 'abstract' in article_data and article_data['abstract']:
+            text_parts.append(article_data['abstract'])
+        
+        # Add content or full text if available
+        if 'content' in article_data and article_data['content'] and article_data['content'] != "See URL for access to this resource.":
+            text_parts.append(article_data['content'])
+        elif 'full_text' in article_data and article_data['full_text']:
+            text_parts.append(article_data['full_text'])
+        
+        # Join all text parts
+        return "\n\n".join(text_parts)
+    
+    def process_article_data(self, article_data):
+        """
+        Extract entities from an already loaded article record.
+        
+        Args:
+            article_data (dict): Article record
+            
+        Returns:
+            list: Extracted entities
+        """
+        return self.extract_entities(self._article_text(article_data))
+    
     def process_article(self, article_path):
         """
         Process a single article file to extract entities.
@@ -149,42 +227,118 @@ class CardiologyEntityExtractor:
             with open(article_path, 'r', encoding='utf-8') as f:
                 article_data = json.load(f)
             
-            # Prepare text for processing
-            text_parts = []
+            entities = self.process_article_data(article_data)
             
-            # Add title
-            if 'title' in article_data and article_data['title']:
-                text_parts.append(article_data['title'])
+            return article_data, entities
             
-            # Add abstract
-            if 'abstract' in article_data and article_data['abstract']:
-                text_parts.append(article_data['abstract'])
+        except Exception as e:
+            logger.error(f"Error processing article {article_path}: {str(e)}")
+            return None, []
+    
+    def _iter_articles(self, dir_path, filenames):
+        """
+        Yield article records from JSON files and JSONL batch files.
+        
+        Args:
+            dir_path (str): Directory containing the files
+            filenames (list): JSON or JSONL file names in the directory
             
-            # Add content or full text if available
-            if 'content' in article_data and article_data['content'] and article_data['content'] != "See URL for access to this resource.":
-                text_parts.append(article_data['content'])
-            elif 'full_text' in article_data and article_data['full_text']:
-                text_parts.append(article_data['full_text'])
+        Yields:
+            tuple: (fallback_id, article_data)
+        """
+        for filename in filenames:
+            article_path = os.path.join(dir_path, filename)
             
-            # Join all text parts
-            full_text = "\n\n".join(text_parts)
+            try:
+                if filename.endswith('.jsonl'):
+                    for line_number, article_data in enumerate(read_jsonl(article_path)):
+                        yield f"{filename}:{line_number}", article_data
+                else:
+                    with open(article_path, 'rb') as f:
+                        yield filename, loads(f.read())
+            except Exception as e:
+                logger.error(f"Error reading article file {article_path}: {str(e)}")
+    
+    def _article_id(self, fallback_id, article_data):
+        """
+        Get the ID an article's results are stored under.
+        
+        Args:
+            fallback_id (str): ID from the article's file, used if it has no ID field
+            article_data (dict): Article record
             
-            # Extract entities
-            entities = self.extract_entities(full_text)
+        Returns:
+            The article's id or PMID, or fallback_id
+        """
+        return article_data.get('id', article_data.get('pmid', fallback_id))
+    
+    def _iter_file_entities(self, dir_path, filenames, progress=True, skip_ids=frozenset()):
+        """
+        Extract entities from the articles in a set of files.
+        
+        Args:
+            dir_path (str): Directory containing the files
+            filenames (list): JSON or JSONL file names in the directory
+            progress (bool): Whether to show a per-article progress bar
+            skip_ids (set): IDs (as strings) of articles not to process
             
-            return article_data, entities
+        Yields:
+            tuple: (article_id, dict with article_data and entities)
+        """
+        # Stream all texts through spaCy in batches, carrying each article along
+        texts = (
+            (self._article_text(article_data), (self._article_id(fallback_id, article_data), article_data))
+            for fallback_id, article_data in self._iter_articles(dir_path, filenames)
+            if str(self._article_id(fallback_id, article_data)) not in skip_ids
+        )
+        docs = self.nlp.pipe(texts, as_tuples=True, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS)
+        
+        for doc, (article_id, article_data) in tqdm(docs, desc="Processing articles", disable=not progress):
+            yield article_id, {
+                'article_data': article_data,
+                'entities': self._entities_from_doc(doc)
+            }
+    
+    def _iter_sharded_entities(self, dir_path, filenames, n_workers, skip_ids=frozenset()):
+        """
+        Extract entities from a set of files split across worker processes.
+        
+        Args:
+            dir_path (str): Directory containing the files
+            filenames (list): JSON or JSONL file names in the directory
+            n_workers (int): Number of worker processes, one shard each
+            skip_ids (set): IDs (as strings) of articles not to process
             
-        except Exception as e:
-            logger.error(f"Error processing article {article_path}: {str(e)}")
-            return None, []
+        Yields:
+            tuple: (article_id, dict with article_data and entities)
+        """
+        shards = [filenames[i::n_workers] for i in range(n_workers)]
+        
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(_process_shard, self.model_name, dir_path, shard, skip_ids)
+                for shard in shards
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Processing shards"):
+                yield from future.result().items()
     
-    def process_directory(self, dir_path, output_path=None):
+    def process_directory(self, dir_path, output_path=None, n_workers=1, resume=True):
         """
         Process all article files in a directory.
         
+        With n_workers > 1 the files are split into that many shards, each
+        processed by a worker process with its own copy of the model. This
+        also parallelizes reading and parsing the article files, which
+        nlp.pipe multiprocessing does not.
+        
+        If an earlier run writing to the same .jsonl output_path failed, the
+        articles it saved are kept and only the remaining ones are processed.
+        
         Args:
-            dir_path (str): Path to directory containing article JSON files
+            dir_path (str): Path to directory containing article JSON or JSONL files
             output_path (str, optional): Path to save processed results
+            n_workers (int): Number of worker processes (default: 1, in process)
+            resume (bool): Whether to continue the output of a failed run
             
         Returns:
             dict: Results with entities by article
@@ -195,49 +349,96 @@ class CardiologyEntityExtractor:
             logger.error(f"Directory does not exist: {dir_path}")
             return {}
         
-        # Get all JSON files in the directory
-        json_files = [f for f in os.listdir(dir_path) if f.endswith('.json')]
+        # Get all JSON and JSONL batch files in the directory
+        json_files = [entry.name for entry in os.scandir(dir_path)
+                      if entry.is_file() and entry.name.endswith(('.json', '.jsonl'))]
         
         if not json_files:
             logger.warning(f"No JSON files found in {dir_path}")
             return {}
         
-        # Process each file
-        results = {}
-        article_count = 0
-        entity_count = 0
+        if output_path:
+            output_path = os.path.join(project_root, output_path)
         
-        for filename in tqdm(json_files, desc="Processing articles"):
-            article_path = os.path.join(dir_path, filename)
-            
-            article_data, entities = self.process_article(article_path)
-            if article_data is None:
-                continue
-            
-            # Store results
-            article_id = article_data.get('id', article_data.get('pmid', filename))
-            results[article_id] = {
-                'article_data': article_data,
-                'entities': entities
-            }
-            
-            article_count += 1
-            entity_count += len(entities)
+        # Results saved by a failed run are kept rather than extracted again
+        results = dict(read_partial_json_items(output_path)) if output_path and resume else {}
+        if results:
+            logger.info(f"Resuming after {len(results)} articles saved by an earlier run")
+        skip_ids = frozenset(results)
         
-        logger.info(f"Processed {article_count} articles, extracted {entity_count} entities")
+        # Process each file
+        n_workers = min(n_workers, len(json_files))
+        if n_workers > 1:
+            items = self._iter_sharded_entities(dir_path, json_files, n_workers, skip_ids)
+        else:
+            items = self._iter_file_entities(dir_path, json_files, skip_ids=skip_ids)
         
-        # Save results if output path provided
+        def collected(items):
+            for article_id, data in items:
+                results[article_id] = data
+                yield article_id, data
+        
+        # Save results if output path provided, writing each article as soon
+        # as it is extracted
         if output_path:
-            output_path = os.path.join(project_root, output_path)
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+            write_json_items(output_path, collected(items), resume=bool(skip_ids))
             
             logger.info(f"Saved extraction results to {output_path}")
+        else:
+            results.update(items)
+        
+        article_count = len(results)
+        entity_count = sum(len(data['entities']) for data in results.values())
+        
+        logger.info(f"Processed {article_count} articles, extracted {entity_count} entities")
         
         return results
     
+    def entities_frame(self, results):
+        """
+        Collect the entities of all articles into one columnar table.
+        
+        Args:
+            results (dict): Results from process_directory
+            
+        Returns:
+            DataFrame: One row per entity mention, with article_id, text,
+                       type, start and end columns
+        """
+        # Accumulate plain column lists, then build the frame once
+        article_ids, texts, types, starts, ends = [], [], [], [], []
+        for article_id, data in results.items():
+            for entity in data['entities']:
+                article_ids.append(str(article_id))
+                texts.append(entity['text'])
+                types.append(entity['type'])
+                starts.append(entity['start'])
+                ends.append(entity['end'])
+        
+        return pd.DataFrame({
+            'article_id': pd.Series(article_ids, dtype=object),
+            'text': pd.Series(texts, dtype=object),
+            'type': pd.Categorical(types, categories=list(self.cardio_terms.keys())),
+            'start': pd.Series(starts, dtype='int32'),
+            'end': pd.Series(ends, dtype='int32')
+        })
+    
+    def save_entity_table(self, results, output_path):
+        """
+        Save the entities of all articles as a Parquet table.
+        
+        Args:
+            results (dict): Results from process_directory
+            output_path (str): Path to save the Parquet file
+        """
+        output_path = os.path.join(project_root, output_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        
+        self.entities_frame(results).to_parquet(output_path, index=False)
+        logger.info(f"Saved entity table to {output_path}")
+    
     def analyze_entity_distribution(self, results):
         """
         Analyze the distribution of extracted entities.
@@ -248,43 +449,61 @@ class CardiologyEntityExtractor:
         Returns:
             dict: Analysis of entity distribution
         """
-        entity_counts = Counter()
-        entity_by_type = {}
+        df = self.entities_frame(results)
         
-        # Initialize counter for each entity type
-        for entity_type in self.cardio_terms.keys():
-            entity_by_type[entity_type] = Counter()
+        # Fold case once per distinct entity text rather than once per mention
+        codes, uniques = pd.factorize(df['text'])
+        text_lower = pd.Series(pd.Index(uniques, dtype=object).str.lower()[codes], index=df.index)
         
-        # Count entities across all articles
-        for article_id, data in results.items():
-            for entity in data['entities']:
-                entity_text = entity['text'].lower()
-                entity_type = entity['type']
-                
-                entity_counts[entity_text] += 1
-                entity_by_type[entity_type][entity_text] += 1
+        entity_counts = text_lower.value_counts()
+        
+        def most_common(counts, n):
+            return [(text, int(count)) for text, count in counts.head(n).items()]
+        
+        # Count each entity text within each type
+        entity_types = {}
+        for entity_type, type_text in text_lower.groupby(df['type'], observed=False):
+            counts = type_text.value_counts()
+            entity_types[entity_type] = {
+                'count': len(type_text),
+                'unique': len(counts),
+                'most_common': most_common(counts, 10)
+            }
         
         # Prepare analysis results
         analysis = {
-            'total_entities': sum(entity_counts.values()),
+            'total_entities': len(df),
             'unique_entities': len(entity_counts),
-            'entity_types': {
-                entity_type: {
-                    'count': sum(counter.values()),
-                    'unique': len(counter),
-                    'most_common': counter.most_common(10)
-                }
-                for entity_type, counter in entity_by_type.items()
-            },
-            'most_common_overall': entity_counts.most_common(20)
+            'entity_types': entity_types,
+            'most_common_overall': most_common(entity_counts, 20)
         }
         
         return analysis
 
+def _process_shard(model_name, dir_path, filenames, skip_ids=frozenset()):
+    """
+    Extract entities from a shard of article files in a worker process.
+    
+    The worker loads its own model rather than receiving a pickled one.
+    
+    Args:
+        model_name (str): Name of the spaCy model to use
+        dir_path (str): Directory containing the files
+        filenames (list): JSON or JSONL file names in the directory
+        skip_ids (set): IDs (as strings) of articles not to process
+        
+    Returns:
+        dict: Results with entities by article
+    """
+    extractor = CardiologyEntityExtractor(model_name)
+    return dict(extractor._iter_file_entities(dir_path, filenames, progress=False, skip_ids=skip_ids))
+
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
     extractor = CardiologyEntityExtractor()
-    results = extractor.process_directory("data/raw", "data/processed/extracted_entities.json")
+    results = extractor.process_directory("data/raw", "data/processed/extracted_entities.jsonl")
+    extractor.save_entity_table(results, "data/processed/entities.parquet")
     analysis = extractor.analyze_entity_distribution(results)
     
     # Print summary
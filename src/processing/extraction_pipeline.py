@@ -0,0 +1,131 @@
+"""
+Module for extracting entities and relationships from articles in a single spaCy pass.
+"""
+import logging
+import os
+from tqdm import tqdm
+
+from src import configure_logging, project_root
+from src.json_utils import read_partial_json_items, write_json_items
+from src.processing.entity_extractor import CardiologyEntityExtractor, SPACY_BATCH_SIZE, SPACY_N_PROCESS
+from src.processing.relationship_extractor import RelationshipExtractor
+
+logger = logging.getLogger(__name__)
+
+class CardiologyExtractionPipeline:
+    """
+    Class to extract entities and relationships together.
+
+    Each article is tokenized once: its entities come from doc.ents and its
+    relationships from the same Doc's sentences, so no intermediate entity
+    results file is written or read back.
+    """
+
+    def __init__(self, model_name="en_core_web_sm"):
+        """
+        Initialize the pipeline with a shared spaCy model.
+        
+        Args:
+            model_name (str): Name of the spaCy model to use
+        """
+        self.entity_extractor = CardiologyEntityExtractor(model_name)
+        self.nlp = self.entity_extractor.nlp
+        
+        # Shares the model, which sets sentence boundaries with its sentencizer
+        self.relationship_extractor = RelationshipExtractor(nlp=self.nlp)
+
+    def iter_directory(self, dir_path, skip_ids=frozenset()):
+        """
+        Extract entities and relationships from all article files in a directory.
+        
+        Args:
+            dir_path (str): Path to directory containing article JSON or JSONL files
+            skip_ids (set): IDs (as strings) of articles not to process
+        
+        Yields:
+            tuple: (article_id, dict with article_data, entities and relationships)
+        """
+        dir_path = os.path.join(project_root, dir_path)
+        
+        if not os.path.exists(dir_path):
+            logger.error(f"Directory does not exist: {dir_path}")
+            return
+        
+        # Get all JSON and JSONL batch files in the directory
+        json_files = [entry.name for entry in os.scandir(dir_path)
+                      if entry.is_file() and entry.name.endswith(('.json', '.jsonl'))]
+        
+        if not json_files:
+            logger.warning(f"No JSON files found in {dir_path}")
+            return
+        
+        # Stream all texts through spaCy in batches, carrying each article along
+        article_ids = (
+            (self.entity_extractor._article_id(fallback_id, article_data), article_data)
+            for fallback_id, article_data in self.entity_extractor._iter_articles(dir_path, json_files)
+        )
+        texts = (
+            (self.entity_extractor._article_text(article_data), (article_id, article_data))
+            for article_id, article_data in article_ids
+            if str(article_id) not in skip_ids
+        )
+        docs = self.nlp.pipe(texts, as_tuples=True, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS)
+        
+        for doc, (article_id, article_data) in tqdm(docs, desc="Extracting entities and relationships"):
+            entities = self.entity_extractor._entities_from_doc(doc)
+            relationships = self.relationship_extractor.extract_relationships_from_doc(doc, entities)
+            
+            yield article_id, {
+                'article_data': article_data,
+                'entities': entities,
+                'relationships': relationships
+            }
+
+    def process_directory(self, dir_path, output_path, resume=True):
+        """
+        Extract entities and relationships from a directory and save the results.
+        
+        Results are written article by article as they are produced, in the
+        format RelationshipExtractor.save_results writes. If an earlier run
+        writing to the same .jsonl output_path failed, the articles it saved
+        are kept and only the remaining ones are processed.
+        
+        Args:
+            dir_path (str): Path to directory containing article JSON or JSONL files
+            output_path (str): Path to save the relationship results
+            resume (bool): Whether to continue the output of a failed run
+        
+        Returns:
+            dict: Numbers of articles, entities and relationships processed
+        """
+        output_path = os.path.join(project_root, output_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        
+        counts = {'articles': 0, 'entities': 0, 'relationships': 0}
+        
+        def counted(results):
+            for article_id, result in results:
+                counts['articles'] += 1
+                counts['entities'] += len(result['entities'])
+                counts['relationships'] += len(result['relationships'])
+                yield article_id, result
+        
+        # Results saved by a failed run are kept rather than extracted again
+        saved = dict(counted(read_partial_json_items(output_path))) if resume else {}
+        if saved:
+            logger.info(f"Resuming after {len(saved)} articles saved by an earlier run")
+        
+        write_json_items(output_path, counted(self.iter_directory(dir_path, frozenset(saved))),
+                         resume=bool(saved))
+        
+        logger.info(f"Processed {counts['articles']} articles, extracted {counts['entities']} entities "
+                    f"and {counts['relationships']} relationships")
+        logger.info(f"Saved relationship results to {output_path}")
+        
+        return counts
+
+# Example usage
+if __name__ == "__main__":
+    configure_logging()
+    pipeline = CardiologyExtractionPipeline()
+    pipeline.process_directory("data/raw", "data/processed/extracted_relationships.jsonl")
\ No newline at end of file
@@ -1,55 +1,54 @@
 """
 Module for extracting relationships between cardiology entities.
 """
-import spacy
 import logging
 import os
-import json
 import re
-from pathlib import Path
-import sys
 from collections import defaultdict, Counter
 import pandas as pd
 from tqdm import tqdm
-import nltk
-from nltk.tokenize import sent_tokenize
 import itertools
+import bisect
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+from src import configure_logging, project_root
+from src.json_utils import iter_json_items, write_json_items
+from src.processing._spacy_cache import UNUSED_PIPES, _load_nlp
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 class RelationshipExtractor:
     """Class to extract relationships between cardiology entities."""
     
-    def __init__(self, model_name="en_core_web_sm"):
+    def __init__(self, model_name="en_core_web_sm", nlp=None):
         """
         Initialize the relationship extractor with a spaCy model.
         
         Args:
             model_name (str): Name of the spaCy model to use
+            nlp (Language, optional): Already loaded pipeline to share instead
+                                      of loading model_name
         """
-        # Load spaCy model
-        try:
-            self.nlp = spacy.load(model_name)
-            logger.info(f"Loaded spaCy model: {model_name}")
-        except Exception as e:
-            logger.error(f"Error loading spaCy model: {str(e)}")
-            raise
+        # Load spaCy model. Only sentence boundaries are needed, so the cached
+        # pipeline the entity extractor uses is shared rather than loading
+        # the full model again.
+        if nlp is not None:
+            self.nlp = nlp
+        else:
+            try:
+                self.nlp = _load_nlp(model_name, UNUSED_PIPES)
+            except Exception as e:
+                logger.error(f"Error loading spaCy model: {str(e)}")
+                raise
         
-        # Try to load NLTK punkt if not already downloaded
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            logger.info("Downloading NLTK punkt tokenizer")
-            nltk.download('punkt')
+        # Sentences come from the spaCy pipeline: from its parser, or from the
+        # rule-based sentencizer _load_nlp adds when the parser is disabled.
+        # The sentencizer can also be run on its own, skipping the NER.
+        if "sentencizer" in self.nlp.pipe_names:
+            self._sentencizer = self.nlp.get_pipe("sentencizer")
+        elif "parser" in self.nlp.pipe_names:
+            self._sentencizer = None
+        else:
+            raise ValueError("The spaCy pipeline must have a parser or sentencizer to set sentence boundaries")
         
         # Define relationship patterns based on entity types
         self.relationship_patterns = [
@@ -117,6 +116,18 @@ class RelationshipExtractor:
                 'rel_type': 'LEADS_TO'
             }
         ]
+        
+        # Compile each pattern once and index them by the (subject type,
+        # object type) pair they connect, so only entity pairs of those types
+        # are ever tried against them
+        self._patterns_by_type_pair = defaultdict(list)
+        for pattern in self.relationship_patterns:
+            pattern['compiled'] = re.compile(pattern['pattern'])
+            type_pair = (pattern['subject_type'], pattern['object_type'])
+            self._patterns_by_type_pair[type_pair].append(pattern)
+        
+        # Entity types that take part in at least one pattern
+        self._pattern_types = frozenset(itertools.chain.from_iterable(self._patterns_by_type_pair))
     
     def extract_relationships_from_sentence(self, sentence, entities):
         """
@@ -135,42 +146,40 @@ class RelationshipExtractor:
         if len(entities) < 2:
             return relationships
         
-        # Process all pairs of entities
-        for entity1, entity2 in itertools.combinations(entities, 2):
-            # Skip if entities are the same
-            if entity1['text'] == entity2['text']:
+        # Group the entities by type, so only type pairs with patterns are paired
+        entities_by_type = defaultdict(list)
+        for entity in entities:
+            if entity['type'] in self._pattern_types:
+                entities_by_type[entity['type']].append(entity)
+        
+        for (subject_type, object_type), patterns in self._patterns_by_type_pair.items():
+            if subject_type not in entities_by_type or object_type not in entities_by_type:
                 continue
             
-            # Get entity types
-            type1 = entity1['type']
-            type2 = entity2['type']
+            # Pairs within one type are unordered, so each is formed only once
+            if subject_type == object_type:
+                pairs = itertools.combinations(entities_by_type[subject_type], 2)
+            else:
+                pairs = itertools.product(entities_by_type[subject_type], entities_by_type[object_type])
             
-            # Check which relationship patterns might apply
-            for pattern in self.relationship_patterns:
-                # Check if entity types match the pattern
-                if ((type1 == pattern['subject_type'] and type2 == pattern['object_type']) or 
-                    (type2 == pattern['subject_type'] and type1 == pattern['object_type'])):
-                    
-                    # Get the text between the entities
-                    start_idx = min(entity1['end'], entity2['end'])
-                    end_idx = max(entity1['start'], entity2['start'])
-                    
-                    # Handle case where one entity is within another
-                    if start_idx > end_idx:
-                        between_text = ""
-                    else:
-                        between_text = sentence[start_idx:end_idx]
-                    
+            for subject, object_entity in pairs:
+                # Skip if entities are the same
+                if subject['text'] == object_entity['text']:
+                    continue
+                
+                # Get the text between the entities
+                start_idx = min(subject['end'], object_entity['end'])
+                end_idx = max(subject['start'], object_entity['start'])
+                
+                # Handle case where one entity is within another
+                if start_idx > end_idx:
+                    between_text = ""
+                else:
+                    between_text = sentence[start_idx:end_idx]
+                
+                for pattern in patterns:
                     # Check if the connecting text matches our pattern
-                    if re.search(pattern['pattern'], between_text) or re.search(pattern['pattern'], sentence):
-                        # Ensure subject-object order based on pattern
-                        if type1 == pattern['subject_type'] and type2 == pattern['object_type']:
-                            subject = entity1
-                            object_entity = entity2
-                        else:
-                            subject = entity2
-                            object_entity = entity1
-                        
+                    if pattern['compiled'].search(between_text):
                         # Create relationship
                         relationship = {
                             'subject': subject['text'],
@@ -200,22 +209,66 @@ class RelationshipExtractor:
         if not text or not entities:
             return []
         
-        # Segment text into sentences
-        sentences = sent_tokenize(text)
+        # The entities are already known, so only sentence boundaries are needed
+        if self._sentencizer is not None:
+            doc = self._sentencizer(self.nlp.make_doc(text))
+        else:
+            doc = self.nlp(text)
         
-        all_relationships = []
+        return self.extract_relationships_from_doc(doc, entities)
+    
+    def extract_relationships_from_doc(self, doc, entities):
+        """
+        Extract relationships from a spaCy document using its sentence boundaries.
         
-        # Process each sentence
-        for sentence in sentences:
-            # Find entities in this sentence
-            sentence_entities = []
-            for entity in entities:
-                # If entity context contains this sentence, include the entity
-                if entity['context'] and sentence in entity['context']:
-                    sentence_entities.append(entity)
+        Args:
+            doc (Doc): Processed document; its pipeline must set sentence boundaries
+            entities (list): Entities extracted from the document
             
-            # Extract relationships from this sentence
-            relationships = self.extract_relationships_from_sentence(sentence, sentence_entities)
+        Returns:
+            list: Extracted relationships
+        """
+        if not entities:
+            return []
+        
+        sentences = list(doc.sents)
+        return self._extract_relationships_from_sentences(
+            [sentence.text for sentence in sentences],
+            [sentence.start_char for sentence in sentences],
+            entities
+        )
+    
+    def _extract_relationships_from_sentences(self, sentences, sentence_starts, entities):
+        """
+        Extract relationships from sentences given their start offsets in the text.
+        
+        Args:
+            sentences (list): Sentence texts, in order
+            sentence_starts (list): Character offset of each sentence in the text
+            entities (list): Entities with character offsets in the same text
+            
+        Returns:
+            list: Extracted relationships
+        """
+        # Assign each entity to the sentence containing it, with its offsets
+        # made relative to that sentence
+        sentence_entities = defaultdict(list)
+        for entity in entities:
+            index = bisect.bisect_right(sentence_starts, entity['start']) - 1
+            if index < 0:
+                continue
+            
+            offset = sentence_starts[index]
+            if entity['end'] <= offset + len(sentences[index]):
+                sentence_entities[index].append(
+                    dict(entity, start=entity['start'] - offset, end=entity['end'] - offset)
+                )
+        
+        all_relationships = []
+        
+        # Process each sentence that contains entities
+        for index, entities_in_sentence in sentence_entities.items():
+            relationships = self.extract_relationships_from_sentence(sentences[index], entities_in_sentence)
             all_relationships.extend(relationships)
         
         return all_relationships
@@ -237,20 +290,13 @@ class RelationshipExtractor:
             return {}
         
         try:
-            # Load entity extraction results
-            with open(entity_results_path, 'r', encoding='utf-8') as f:
-                entity_results = json.load(f)
-            
-            if not entity_results:
-                logger.warning("Entity results file is empty")
-                return {}
-            
-            # Process each article's entities
+            # Process each article's entities, streaming them from the results file
             relationship_results = {}
             article_count = 0
             relationship_count = 0
             
-            for article_id, data in tqdm(entity_results.items(), desc="Extracting relationships"):
+            entity_results = iter_json_items(entity_results_path)
+            for article_id, data in tqdm(entity_results, desc="Extracting relationships"):
                 article_data = data['article_data']
                 entities = data['entities']
                 
@@ -287,6 +333,9 @@ class RelationshipExtractor:
                 article_count += 1
                 relationship_count += len(relationships)
             
+            if not article_count:
+                logger.warning("Entity results file is empty")
+            
             logger.info(f"Processed {article_count} articles, extracted {relationship_count} relationships")
             return relationship_results
             
@@ -309,8 +358,7 @@ class RelationshipExtractor:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+            write_json_items(output_path, results.items())
             
             logger.info(f"Saved relationship results to {output_path}")
             return True
@@ -363,9 +411,10 @@ class RelationshipExtractor:
 
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
     extractor = RelationshipExtractor()
-    results = extractor.process_entity_results("data/processed/extracted_entities.json")
-    extractor.save_results(results, "data/processed/extracted_relationships.json")
+    results = extractor.process_entity_results("data/processed/extracted_entities.jsonl")
+    extractor.save_results(results, "data/processed/extracted_relationships.jsonl")
     
     # Analyze results
     analysis = extractor.analyze_relationship_distribution(results)
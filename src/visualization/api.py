@@ -0,0 +1,173 @@
+"""
+ASGI application serving the JSON API of the Cardiology Knowledge Graph with FastAPI.
+
+The API routes are served natively; every other path (the HTML pages and
+static files) falls through to the Flask application.
+"""
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.middleware.wsgi import WSGIMiddleware
+from fastapi.responses import JSONResponse
+from limits import parse_many
+from limits.storage import storage_from_string
+from limits.strategies import MovingWindowRateLimiter
+from typing import Optional
+from werkzeug.http import parse_etags
+import logging
+
+from src.visualization.app import (app as flask_app, _get_views, _json_body, _result_limit, VIEW_METHODS,
+                                   MIN_SEARCH_LENGTH, RATELIMIT_STORAGE_URI, SEARCH_RATE_LIMIT, TRUSTED_PROXIES)
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Cardiology Knowledge Graph API")
+
+# Search is rate limited per client, with the same limits and storage
+# backend as the Flask app
+SEARCH_RATE_LIMITS = parse_many(SEARCH_RATE_LIMIT)
+rate_limiter = MovingWindowRateLimiter(storage_from_string(RATELIMIT_STORAGE_URI))
+
+# The handlers are plain functions, which FastAPI runs in its thread pool, so
+# a slow Neo4j query blocks one pooled thread rather than the event loop.
+# They share the Flask app's DualProcessViews and its caches.
+
+def _client_address(request):
+    """
+    Get the address of the client a request came from.
+    
+    Like ProxyFix in the Flask app, when TRUSTED_PROXIES is set the address
+    is taken from X-Forwarded-For, as added by the outermost trusted proxy.
+    
+    Args:
+        request (Request): The incoming request
+    
+    Returns:
+        str: The client's address
+    """
+    if TRUSTED_PROXIES:
+        forwarded = [address.strip() for address in request.headers.get('x-forwarded-for', '').split(',')]
+        if len(forwarded) >= TRUSTED_PROXIES and forwarded[-TRUSTED_PROXIES]:
+            return forwarded[-TRUSTED_PROXIES]
+    return request.client.host if request.client else 'unknown'
+
+def _limit_param(value, default):
+    """
+    Parse a limit query parameter the way the Flask routes do.
+    
+    Args:
+        value (str): Raw parameter value, or None if absent
+        default (int): Limit used when the value is absent or not an integer
+    
+    Returns:
+        int: The limit to query with, clamped by _result_limit
+    """
+    try:
+        return _result_limit(int(value))
+    except (TypeError, ValueError):
+        return _result_limit(default)
+
+def _json_response(request, data, etag=None):
+    """
+    Build a conditional JSON response from data or from an already encoded body.
+    
+    Args:
+        request (Request): The incoming request
+        data: JSON-serializable object, or encoded JSON bytes
+        etag (str, optional): ETag of the body, computed if not given
+    
+    Returns:
+        Response: The JSON response, or an empty 304 if the client's
+                  If-None-Match matches its ETag
+    """
+    body, etag, headers = _json_body(data, etag, request.headers.get('accept-encoding'))
+    
+    if parse_etags(request.headers.get('if-none-match')).contains(etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type='application/json', headers=headers)
+
+@app.get('/api/search')
+def search_entities(request: Request, q: str = '', limit: Optional[str] = None):
+    """
+    API endpoint to search for entities.
+    
+    Query Parameters:
+        q (str): Search term
+        limit (int): Maximum number of results (default: 10, at most 50)
+    """
+    client = _client_address(request)
+    if not all(rate_limiter.hit(item, 'api.search', client) for item in SEARCH_RATE_LIMITS):
+        return JSONResponse({'error': f"Rate limit exceeded: {SEARCH_RATE_LIMIT}"}, status_code=429)
+    
+    search_term = ' '.join(q.lower().split())
+    if len(search_term) < MIN_SEARCH_LENGTH:
+        return {'results': []}
+    
+    try:
+        results, etag = _get_views().json('search_entities', search_term, _limit_param(limit, 10))
+        return _json_response(request, b'{"results":' + results + b'}', etag)
+    except Exception as e:
+        logger.exception("Error searching entities: %s", e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@app.get('/api/entity/{entity_name}')
+def get_entity_info(request: Request, entity_name: str,
+                    entity_type: Optional[str] = Query(None, alias='type')):
+    """
+    API endpoint to get entity information.
+    
+    Path Parameters:
+        entity_name (str): Name of the entity
+    
+    Query Parameters:
+        type (str): Entity type (optional)
+    """
+    try:
+        return _json_response(request, *_get_views().json('get_entity_info', entity_name, entity_type))
+    except Exception as e:
+        logger.exception("Error getting entity info: %s", e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@app.get('/api/view/{view_type}/{entity_name}')
+def get_graph_view(request: Request, view_type: str, entity_name: str,
+                   entity_type: Optional[str] = Query(None, alias='type'), limit: Optional[str] = None):
+    """
+    API endpoint to get a graph view.
+    
+    Path Parameters:
+        view_type (str): Type of view (system1, system2, complete, or all
+                         for the other three keyed by view type)
+        entity_name (str): Name of the entity
+    
+    Query Parameters:
+        type (str): Entity type (optional)
+        limit (int): Maximum number of relationships (default and maximum: 50)
+    """
+    if view_type not in VIEW_METHODS:
+        return JSONResponse({'error': f"Invalid view type: {view_type}"}, status_code=400)
+    
+    try:
+        return _json_response(request, *_get_views().json(VIEW_METHODS[view_type], entity_name, entity_type,
+                                                   _limit_param(limit, 50)))
+    except Exception as e:
+        logger.exception("Error generating view: %s", e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@app.get('/api/views/{entity_name}')
+def get_all_graph_views(request: Request, entity_name: str,
+                        entity_type: Optional[str] = Query(None, alias='type'), limit: Optional[str] = None):
+    """
+    API endpoint to get the System 1, System 2 and complete views at once.
+    
+    Same as /api/view/all/{entity_name}.
+    
+    Path Parameters:
+        entity_name (str): Name of the entity
+    
+    Query Parameters:
+        type (str): Entity type (optional)
+        limit (int): Maximum number of relationships per view (default and maximum: 50)
+    """
+    return get_graph_view(request, 'all', entity_name, entity_type, limit)
+
+# Everything else is served by the Flask application
+app.mount('/', WSGIMiddleware(flask_app))
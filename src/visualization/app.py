@@ -1,64 +1,335 @@
 """
 Flask application for the Cardiology Knowledge Graph visualization interface.
 """
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory
+from flask.json.provider import JSONProvider
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from markupsafe import escape
+from werkzeug.http import parse_accept_header, quote_etag
+from werkzeug.middleware.proxy_fix import ProxyFix
+from cachetools import TTLCache
+import functools
+import gzip
+import hashlib
 import logging
 import os
 import json
-from pathlib import Path
-import sys
+import threading
 
-# Add the project root to the path to import modules correctly
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-from src.dual_process.view_generator import DualProcessViews
+from src import configure_logging
+from src.json_utils import dumps, loads
+from src.dual_process.view_generator import DualProcessViews, json_etag, VIEW_CACHE_SIZE, VIEW_CACHE_TTL
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# The app module is the web entry point (it is imported by `flask run`),
+# so it configures logging itself rather than relying on a __main__ block
+configure_logging()
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider using json_utils, which encodes with orjson when installed."""
+    
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+# Static files and templates live next to this module; resolved once at import
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
 # Initialize Flask app
-app = Flask(__name__, 
-            static_folder=os.path.join(project_root, "src", "visualization", "static"),
-            template_folder=os.path.join(project_root, "src", "visualization", "templates"))
+app = Flask(__name__, static_folder=STATIC_FOLDER, template_folder=TEMPLATE_FOLDER)
+app.json = OrjsonProvider(app)
+
+# Static URLs carry a hash of the file's content (see _static_version), so
+# browsers may cache static files for a long time. In production, nginx
+# serves /static/ itself (nginx.conf); USE_X_SENDFILE=1 instead hands files
+# Flask serves to an Apache or lighttpd front end to send.
+STATIC_MAX_AGE = 30 * 24 * 60 * 60
+
+# Behind nginx, take the client address from the proxy's X-Forwarded-For
+# headers, so rate limits apply per client rather than to the proxy
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES,
+                            x_host=TRUSTED_PROXIES)
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = STATIC_MAX_AGE
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+
+@functools.lru_cache(maxsize=None)
+def _static_hash(filename):
+    """
+    Hash the content of a static file, for cache busting.
+    
+    Args:
+        filename (str): Path of the file within the static folder
+        
+    Returns:
+        str: Short hex digest of the file, or '' if it cannot be read
+    """
+    try:
+        with open(os.path.join(STATIC_FOLDER, filename), 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    except OSError:
+        return ''
+
+@app.url_defaults
+def _static_version(endpoint, values):
+    """Add the content hash of static files to their URLs as ?v=."""
+    if endpoint == 'static' and 'filename' in values and not app.debug:
+        values.setdefault('v', _static_hash(values['filename']))
+
+# Per-client rate limits, counted in memory unless a shared storage (e.g.
+# redis://) is configured; with several gunicorn workers each counts its own
+RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'memory://')
+limiter = Limiter(get_remote_address, app=app, default_limits=[], storage_uri=RATELIMIT_STORAGE_URI)
+
+# The dual process views generator, created on first use so importing the
+# app (e.g. in a gunicorn master before forking) does not connect to Neo4j
+views = None
+_views_lock = threading.Lock()
+
+def _get_views():
+    """
+    Get this process's DualProcessViews, creating it on first use.
+    
+    Returns:
+        DualProcessViews: The views generator
+    """
+    global views
+    if views is None:
+        with _views_lock:
+            if views is None:
+                views = DualProcessViews()
+    return views
+
+# Entities whose pages are cached when a worker starts, comma-separated
+WARM_UP_ENTITIES = os.environ.get('WARM_UP_ENTITIES', 'Heart failure')
+
+def warm_up(entity_names=None):
+    """
+    Populate the view caches for the given entities before serving requests.
+    
+    Each entity's info, graph views and search results are cached under the
+    same keys the API endpoints use with their default parameters, and the
+    first Neo4j sessions are opened. Failures are logged rather than raised,
+    so a worker still starts if the database is unavailable.
+    
+    Args:
+        entity_names (list, optional): Entity names, defaults to WARM_UP_ENTITIES
+    """
+    if entity_names is None:
+        entity_names = [name.strip() for name in WARM_UP_ENTITIES.split(',') if name.strip()]
+    
+    for entity_name in entity_names:
+        try:
+            _get_views().json('get_entity_info', entity_name, None)
+            _get_views().json('generate_all_views', entity_name, None, MAX_RESULT_LIMIT)
+            _get_views().json('search_entities', ' '.join(entity_name.lower().split()), 10)
+        except Exception as e:
+            logger.warning("Could not warm up views for %s: %s", entity_name, e)
+
+# Shortest search term sent to the full-text index, the per-client search
+# rate limit, and the largest result limit a client may request
+MIN_SEARCH_LENGTH = 3
+SEARCH_RATE_LIMIT = "30/minute;5/second"
+MAX_RESULT_LIMIT = 50
 
-# Initialize the dual process views generator
-views = DualProcessViews()
+# How long (in seconds) browsers may reuse a JSON response without revalidating
+BROWSER_CACHE_MAX_AGE = 60
+
+# JSON bodies smaller than this are sent uncompressed, and the compression
+# levels used for larger ones
+COMPRESS_MIN_SIZE = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESS_ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+# Compressed JSON bodies, keyed by (ETag, body length, encoding), so each
+# distinct payload is compressed once per encoding
+_compressed_cache = TTLCache(maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL)
+_compressed_lock = threading.Lock()
+
+# Cached DualProcessViews method behind each view type; 'all' returns the
+# other three together
+VIEW_METHODS = {
+    'system1': 'generate_system1_view',
+    'system2': 'generate_system2_view',
+    'complete': 'generate_complete_view',
+    'all': 'generate_all_views',
+}
+
+# Rendered in place of the entity name when a page is cached, then replaced
+# by the escaped name of each request
+ENTITY_NAME_PLACEHOLDER = "@@ENTITY_NAME@@"
+
+@functools.lru_cache(maxsize=None)
+def _page_parts(template_name):
+    """
+    Render a page template once, split around the entity name placeholder.
+    
+    Args:
+        template_name (str): Name of the template
+        
+    Returns:
+        tuple: Rendered HTML before, between and after each entity name
+    """
+    return tuple(render_template(template_name, entity_name=ENTITY_NAME_PLACEHOLDER)
+                 .split(ENTITY_NAME_PLACEHOLDER))
+
+def _render_page(template_name, entity_name=''):
+    """
+    Render a page whose only request-dependent content is the entity name.
+    
+    The template is rendered on first use and reused afterwards, except in
+    debug mode, where templates are reloaded on every request.
+    
+    Args:
+        template_name (str): Name of the template
+        entity_name (str): Entity name to show on the page
+        
+    Returns:
+        str: Rendered HTML
+    """
+    if app.debug:
+        return render_template(template_name, entity_name=entity_name)
+    
+    # Escaped the same way Jinja's autoescaping would
+    return str(escape(entity_name)).join(_page_parts(template_name))
+
+def _result_limit(limit):
+    """
+    Clamp a client-supplied result limit to between 1 and MAX_RESULT_LIMIT.
+    
+    Args:
+        limit (int): Requested limit
+        
+    Returns:
+        int: The limit to query with
+    """
+    return max(1, min(limit, MAX_RESULT_LIMIT))
+
+def _compressed(body, etag, encoding):
+    """
+    Compress a JSON body, reusing an earlier compression of the same body.
+    
+    Args:
+        body (bytes): Encoded JSON
+        etag (str): ETag of the body
+        encoding (str): Content encoding, 'br' or 'gzip'
+        
+    Returns:
+        bytes: The compressed body
+    """
+    key = (etag, len(body), encoding)
+    with _compressed_lock:
+        compressed = _compressed_cache.get(key)
+    
+    if compressed is None:
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        with _compressed_lock:
+            _compressed_cache[key] = compressed
+    
+    return compressed
+
+def _json_body(data, etag, accept_encoding):
+    """
+    Prepare a JSON response body and its caching headers.
+    
+    Bodies of COMPRESS_MIN_SIZE bytes or more are compressed with the best
+    encoding the client accepts, and each encoding gets its own ETag. Used
+    by both this app and the FastAPI app in api.py.
+    
+    Args:
+        data: JSON-serializable object, or encoded JSON bytes
+        etag (str): ETag of the encoded JSON, computed if None
+        accept_encoding (str): The request's Accept-Encoding header, if any
+        
+    Returns:
+        tuple: (body bytes, ETag of the body as sent, dict of response headers)
+    """
+    if not isinstance(data, (bytes, bytearray)):
+        data = dumps(data)
+    etag = etag or json_etag(data)
+    
+    encoding = None
+    if len(data) >= COMPRESS_MIN_SIZE:
+        encoding = parse_accept_header(accept_encoding).best_match(COMPRESS_ENCODINGS)
+    if encoding:
+        data = _compressed(bytes(data), etag, encoding)
+        etag = f"{etag}-{encoding}"
+    
+    headers = {
+        'ETag': quote_etag(etag),
+        'Cache-Control': f"private, max-age={BROWSER_CACHE_MAX_AGE}",
+        'Vary': 'Accept-Encoding'
+    }
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    
+    return bytes(data), etag, headers
+
+def _json_response(data, etag=None):
+    """
+    Build a conditional JSON response from data or from an already encoded body.
+    
+    The response carries an ETag, so a client that sends it back in
+    If-None-Match gets an empty 304 Not Modified instead of the body.
+    
+    Args:
+        data: JSON-serializable object, or encoded JSON bytes
+        etag (str, optional): ETag of the body, computed if not given
+        
+    Returns:
+        Response: Response with an application/json body
+    """
+    body, etag, headers = _json_body(data, etag, request.headers.get('Accept-Encoding'))
+    response = Response(body, mimetype='application/json', headers=headers)
+    return response.make_conditional(request)
 
 @app.route('/')
 def index():
     """Render the main page."""
-    return render_template('index.html')
+    return _render_page('index.html')
 
 @app.route('/about')
 def about():
     """Render the about page."""
-    return render_template('about.html')
+    return _render_page('about.html')
 
 @app.route('/api/search', methods=['GET'])
+@limiter.limit(SEARCH_RATE_LIMIT)
 def search_entities():
     """
     API endpoint to search for entities.
     
     Query Parameters:
         q (str): Search term
-        limit (int): Maximum number of results (default: 10)
+        limit (int): Maximum number of results (default: 10, at most 50)
     """
-    search_term = request.args.get('q', '')
-    limit = request.args.get('limit', 10, type=int)
+    # Search is case-insensitive, so a normalized term lets every casing
+    # of a query share one cached result
+    search_term = ' '.join(request.args.get('q', '').lower().split())
+    limit = _result_limit(request.args.get('limit', 10, type=int))
     
-    if not search_term or len(search_term) < 2:
+    if len(search_term) < MIN_SEARCH_LENGTH:
         return jsonify({'results': []})
     
     try:
-        results = views.search_entities(search_term, limit)
-        return jsonify({'results': results})
+        results, etag = _get_views().json('search_entities', search_term, limit)
+        return _json_response(b'{"results":' + results + b'}', etag)
     except Exception as e:
-        logger.error(f"Error searching entities: {str(e)}")
+        logger.exception("Error searching entities: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/entity/<entity_name>', methods=['GET'])
@@ -75,10 +346,9 @@ def get_entity_info(entity_name):
     entity_type = request.args.get('type', None)
     
     try:
-        info = views.get_entity_info(entity_name, entity_type)
-        return jsonify(info)
+        return _json_response(*_get_views().json('get_entity_info', entity_name, entity_type))
     except Exception as e:
-        logger.error(f"Error getting entity info: {str(e)}")
+        logger.exception("Error getting entity info: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/view/<view_type>/<entity_name>', methods=['GET'])
@@ -87,50 +357,66 @@ def get_graph_view(view_type, entity_name):
     API endpoint to get a graph view.
     
     Path Parameters:
-        view_type (str): Type of view (system1, system2, complete)
+        view_type (str): Type of view (system1, system2, complete, or all
+                         for the other three keyed by view type)
         entity_name (str): Name of the entity
     
     Query Parameters:
         type (str): Entity type (optional)
-        limit (int): Maximum number of relationships (default: 50)
+        limit (int): Maximum number of relationships (default and maximum: 50)
     """
     entity_type = request.args.get('type', None)
-    limit = request.args.get('limit', 50, type=int)
+    limit = _result_limit(request.args.get('limit', 50, type=int))
     
     try:
-        if view_type == 'system1':
-            view = views.generate_system1_view(entity_name, entity_type, limit)
-        elif view_type == 'system2':
-            view = views.generate_system2_view(entity_name, entity_type, limit)
-        elif view_type == 'complete':
-            view = views.generate_complete_view(entity_name, entity_type, limit)
-        else:
+        if view_type not in VIEW_METHODS:
             return jsonify({'error': f"Invalid view type: {view_type}"}), 400
         
-        return jsonify(view)
+        return _json_response(*_get_views().json(VIEW_METHODS[view_type], entity_name, entity_type, limit))
     except Exception as e:
-        logger.error(f"Error generating view: {str(e)}")
+        logger.exception("Error generating view: %s", e)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/views/<entity_name>', methods=['GET'])
+def get_all_graph_views(entity_name):
+    """
+    API endpoint to get the System 1, System 2 and complete views at once.
+    
+    Same as /api/view/all/<entity_name>.
+    
+    Path Parameters:
+        entity_name (str): Name of the entity
+    
+    Query Parameters:
+        type (str): Entity type (optional)
+        limit (int): Maximum number of relationships per view (default and maximum: 50)
+    """
+    return get_graph_view('all', entity_name)
+
 @app.route('/entity/<entity_name>')
 def entity_detail(entity_name):
     """Render the entity detail page."""
-    return render_template('entity.html', entity_name=entity_name)
+    return _render_page('entity.html', entity_name)
 
 # Error handlers
 @app.errorhandler(404)
 def page_not_found(e):
     """Handle 404 errors."""
-    return render_template('404.html'), 404
+    return _render_page('404.html'), 404
+
+@app.errorhandler(429)
+def rate_limit_exceeded(e):
+    """Handle rate limit errors."""
+    return jsonify({'error': f"Rate limit exceeded: {e.description}"}), 429
 
 @app.errorhandler(500)
 def server_error(e):
     """Handle 500 errors."""
-    return render_template('500.html'), 500
+    return _render_page('500.html'), 500
 
 if __name__ == '__main__':
-    # Get port from environment variable or use default
+    # Development server only; production runs under gunicorn (gunicorn.conf.py)
     port = int(os.environ.get('PORT', 5000))
     
     # Run the app
-    app.run(host='0.0.0.0', port=port, debug=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG') == '1')
\ No newline at end of file